@@ -0,0 +1,172 @@
+import argparse
+import contextlib
+import glob
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from main_pipeline import FILLER_JSON_PATH, run_pipeline
+from mom_generator.llm_scheduler import BATCH, BATCH_SHARE, configure_scheduler
+
+MANIFEST_NAME = "manifest.json"
+LOG_NAME = "pipeline.log"
+
+
+# -------------------------------------------------------
+# INPUT DISCOVERY
+# -------------------------------------------------------
+def resolve_inputs(inputs):
+    """
+    Expands directories (all *.txt inside) and glob patterns into a
+    sorted, de-duplicated list of transcript paths.
+    """
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths.extend(glob.glob(os.path.join(item, "*.txt")))
+        else:
+            paths.extend(glob.glob(item, recursive=True))
+    return sorted({os.path.abspath(p) for p in paths if os.path.isfile(p)})
+
+
+def assign_output_dirs(paths, output_root):
+    """One output folder per transcript, named after the file stem."""
+    used = {}
+    out_dirs = []
+    for path in paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        count = used.get(stem, 0)
+        used[stem] = count + 1
+        name = stem if count == 0 else f"{stem}_{count}"
+        out_dirs.append(os.path.join(output_root, name))
+    return out_dirs
+
+
+# -------------------------------------------------------
+# WORKER
+# -------------------------------------------------------
+def init_worker(workers):
+    """
+    Batch workers run at batch priority and split the batch share of the
+    rate limits, so together they leave room for interactive runs.
+    """
+    configure_scheduler(priority=BATCH, share=BATCH_SHARE / workers)
+
+
+def process_transcript(transcript_path, output_dir, filler_json_path):
+    """
+    Runs the full pipeline for one transcript inside a worker process.
+    Never raises: failures are returned as a manifest record.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    start = time.perf_counter()
+    record = {"input": transcript_path, "output_dir": output_dir}
+
+    with open(os.path.join(output_dir, LOG_NAME), "w", encoding="utf-8") as log:
+        with contextlib.redirect_stdout(log):
+            try:
+                record["outputs"] = run_pipeline(transcript_path, output_dir, filler_json_path)
+                record["status"] = "success"
+            except Exception as e:
+                traceback.print_exc(file=log)
+                record["status"] = "failed"
+                record["error"] = f"{type(e).__name__}: {e}"
+
+    record["seconds"] = round(time.perf_counter() - start, 3)
+    return record
+
+
+# -------------------------------------------------------
+# MANIFEST
+# -------------------------------------------------------
+def write_manifest(records, manifest_path, started_at):
+    succeeded = sum(1 for r in records if r["status"] == "success")
+    manifest = {
+        "started_at": started_at,
+        "finished_at": datetime.now().isoformat(timespec="seconds"),
+        "total": len(records),
+        "succeeded": succeeded,
+        "failed": len(records) - succeeded,
+        "files": sorted(records, key=lambda r: r["input"]),
+    }
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+
+# -------------------------------------------------------
+# MAIN PROCESS
+# -------------------------------------------------------
+def run_batch(inputs, output_root, workers=4, filler_json_path=FILLER_JSON_PATH):
+    paths = resolve_inputs(inputs)
+    os.makedirs(output_root, exist_ok=True)
+    manifest_path = os.path.join(output_root, MANIFEST_NAME)
+    started_at = datetime.now().isoformat(timespec="seconds")
+
+    if not paths:
+        print("No transcripts found.")
+        write_manifest([], manifest_path, started_at)
+        return []
+
+    out_dirs = assign_output_dirs(paths, output_root)
+    filler_json_path = os.path.abspath(filler_json_path)
+    print(f"Processing {len(paths)} transcripts with {workers} workers...")
+
+    records = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(workers,)) as pool:
+        futures = {
+            pool.submit(process_transcript, path, out_dir, filler_json_path): (path, out_dir)
+            for path, out_dir in zip(paths, out_dirs)
+        }
+        for future in as_completed(futures):
+            path, out_dir = futures[future]
+            try:
+                record = future.result()
+            except Exception as e:
+                # The worker process itself died (e.g. killed, out of memory)
+                record = {
+                    "input": path,
+                    "output_dir": out_dir,
+                    "status": "failed",
+                    "error": f"{type(e).__name__}: {e}",
+                }
+            records.append(record)
+            print(f"[{len(records)}/{len(paths)}] {record['status']}: {path}")
+            write_manifest(records, manifest_path, started_at)
+
+    failed = sum(1 for r in records if r["status"] != "success")
+    print(f"Batch complete: {len(records) - failed} succeeded, {failed} failed.")
+    print(f"Manifest: {manifest_path}")
+    return records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Generate Minutes of Meeting for many transcripts in parallel."
+    )
+    parser.add_argument(
+        "inputs",
+        nargs="+",
+        help="Transcript directories (all *.txt inside) or glob patterns.",
+    )
+    parser.add_argument("-o", "--output-dir", required=True, help="Root folder for outputs.")
+    parser.add_argument(
+        "-w", "--workers", type=int, default=min(4, os.cpu_count() or 1),
+        help="Number of transcripts processed at once.",
+    )
+    parser.add_argument(
+        "--filler-words", default=FILLER_JSON_PATH, help="Path to filler_words.json."
+    )
+    args = parser.parse_args(argv)
+
+    records = run_batch(args.inputs, args.output_dir, max(1, args.workers), args.filler_words)
+    return 0 if all(r["status"] == "success" for r in records) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""
+Throughput of remove_filler_words_preserving_structure on synthetic
+transcripts of increasing size. A linear engine keeps roughly constant
+MB/s (seconds per MB) from the smallest to the largest input.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_filler_removal --sizes 10 25 50 100
+"""
+import argparse
+import time
+
+from clean_transcript import (
+    compile_filler_scanner,
+    load_filler_words,
+    remove_filler_words_preserving_structure,
+)
+from benchmarks.synthetic import generate_transcript
+
+MB = 1024 * 1024
+
+
+def run(sizes_mb, filler_json_path, repeat):
+    filler_words = load_filler_words(filler_json_path)
+    compile_filler_scanner(filler_words)  # warm the automaton cache
+
+    results = []
+    print(f"{'size MB':>8} {'seconds':>9} {'MB/s':>8} {'s per MB':>9}")
+    for size_mb in sizes_mb:
+        text = generate_transcript(num_bytes=int(size_mb * MB))
+        actual_mb = len(text) / MB
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            remove_filler_words_preserving_structure(text, filler_words)
+            best = min(best, time.perf_counter() - start)
+        del text
+        results.append((actual_mb, best))
+        print(f"{actual_mb:8.1f} {best:9.2f} {actual_mb / best:8.1f} {best / actual_mb:9.4f}")
+
+    if len(results) > 1:
+        (small_mb, small_s), (large_mb, large_s) = results[0], results[-1]
+        ratio = (large_s / large_mb) / (small_s / small_mb)
+        print(f"Seconds per MB, largest vs smallest input: {ratio:.2f}x (1.00 = linear)")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=float, nargs="+", default=[10, 25, 50, 100],
+                        help="Transcript sizes in MB.")
+    parser.add_argument("--filler-words", default="data/filler_words.json")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per size; best time is kept.")
+    args = parser.parse_args()
+    run(args.sizes, args.filler_words, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
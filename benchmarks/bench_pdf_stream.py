@@ -0,0 +1,99 @@
+"""
+PDF rendering of the MoM with the speaker-labeled transcript as an
+appendix: pages per second and peak RSS of the streaming writer
+(format_mom_pdf) and, up to --baseline-max-lines, of an in-memory fpdf
+document built with one multi_cell per line, each run in a fresh
+interpreter.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_pdf_stream --lines 1000 10000 100000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.synthetic import generate_lines
+
+_PROBE = """
+import json, resource, sys, time
+mom_path, transcript_path, out_path = sys.argv[1:4]
+with open(mom_path, "r", encoding="utf-8") as f:
+    mom_text = f.read()
+start = time.perf_counter()
+if "{writer}" == "stream":
+    from mom_generator.mom_formatter import format_mom_pdf
+    from mom_generator.pdf_stream import pdf_page_count
+    format_mom_pdf(mom_text, out_path, transcript=transcript_path)
+    seconds = time.perf_counter() - start
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    pages = pdf_page_count(out_path)
+else:
+    from fpdf import FPDF
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+    width = pdf.w - 2 * pdf.l_margin
+    pdf.set_font("Helvetica", size=12)
+    for line in mom_text.splitlines():
+        if line.strip():
+            pdf.multi_cell(width, 8, line, new_x="LMARGIN", new_y="NEXT")
+    # The appendix in the same 9 pt type as the streaming writer
+    pdf.add_page()
+    pdf.set_font("Helvetica", size=9)
+    with open(transcript_path, "r", encoding="utf-8") as f:
+        for line in f.read().splitlines():
+            if line.strip():
+                pdf.multi_cell(width, 3.88, line, new_x="LMARGIN", new_y="NEXT")
+    pdf.output(out_path)
+    seconds = time.perf_counter() - start
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    pages = pdf.page_no()
+print(json.dumps({{"seconds": seconds, "pages": pages, "max_rss_mb": max_rss / 1024}}))
+"""
+
+
+def write_labeled_transcript(path, num_lines):
+    """Synthetic speaker-labeled transcript, written line by line."""
+    with open(path, "w", encoding="utf-8") as f:
+        for i, line in enumerate(generate_lines(num_lines)):
+            timestamp, text = line.split(" ", 1)
+            f.write(f"{timestamp} Speaker {i % 2 + 1}: {text}\n")
+
+
+def measure(writer, mom_path, transcript_path, out_path):
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(writer=writer), mom_path, transcript_path, out_path],
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--mom", default="data/final_mom.txt")
+    parser.add_argument("--lines", type=int, nargs="*", default=[1_000, 10_000, 100_000],
+                        help="Synthetic transcript sizes in lines.")
+    parser.add_argument("--baseline-max-lines", type=int, default=10_000,
+                        help="Largest size the in-memory fpdf baseline is run at.")
+    args = parser.parse_args()
+    mom_path = os.path.abspath(args.mom)
+
+    print(f"{'lines':>9} {'writer':<8} {'pages':>7} {'seconds':>9} {'pages/s':>9} {'peak RSS':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for num_lines in args.lines:
+            transcript_path = os.path.join(tmp, f"transcript_{num_lines}.txt")
+            write_labeled_transcript(transcript_path, num_lines)
+            writers = ["stream"] + (["fpdf"] if num_lines <= args.baseline_max_lines else [])
+            for writer in writers:
+                r = measure(writer, mom_path, transcript_path, os.path.join(tmp, f"{writer}.pdf"))
+                print(
+                    f"{num_lines:>9} {writer:<8} {r['pages']:>7} {r['seconds']:>9.2f} "
+                    f"{r['pages'] / r['seconds']:>9.1f} {r['max_rss_mb']:>7.1f} MB"
+                )
+
+
+if __name__ == "__main__":
+    main()
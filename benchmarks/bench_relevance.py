@@ -0,0 +1,54 @@
+"""
+Relevance filter: prompt tokens each extraction type sends with and
+without it, on a speaker-labeled transcript and on synthetic transcripts
+(speakers alternating line by line), with the time the scoring takes.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_relevance --transcript data/speaker_labeled_transcript.txt --lines 1000 10000 100000
+"""
+import argparse
+import re
+import time
+
+from mom_generator.chunking import estimate_tokens
+from mom_generator.relevance import KEEP_FRACTION, relevant_transcript
+from benchmarks.synthetic import generate_lines
+
+_TIMESTAMP = re.compile(r"^(\d{1,2}:\d{2})\s+")
+
+
+def labeled_transcript(num_lines):
+    """Synthetic transcript in the speaker-labeled format."""
+    return "\n".join(
+        _TIMESTAMP.sub(lambda m: f"{m.group(1)} Speaker {i % 2 + 1}: ", line)
+        for i, line in enumerate(generate_lines(num_lines))
+    )
+
+
+def bench(name, transcript):
+    full = estimate_tokens(transcript)
+    print(f"{name}: {full} transcript tokens")
+    kinds = [[kind] for kind in KEEP_FRACTION] + [list(KEEP_FRACTION)]
+    for group in kinds:
+        start = time.perf_counter()
+        kept = estimate_tokens(relevant_transcript(transcript, group))
+        seconds = time.perf_counter() - start
+        label = group[0] if len(group) == 1 else "mom_sections (all)"
+        print(f"  {label:<20} {kept:>9} tokens ({1 - kept / full:>4.0%} less) {seconds:>8.3f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--transcript", default="data/speaker_labeled_transcript.txt")
+    parser.add_argument("--lines", type=int, nargs="*", default=[1_000, 10_000, 100_000],
+                        help="Synthetic transcript sizes in lines.")
+    args = parser.parse_args()
+
+    with open(args.transcript, "r", encoding="utf-8") as f:
+        bench(args.transcript, f.read())
+    for num_lines in args.lines:
+        bench(f"synthetic {num_lines} lines", labeled_transcript(num_lines))
+
+
+if __name__ == "__main__":
+    main()
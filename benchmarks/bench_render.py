@@ -0,0 +1,45 @@
+"""
+MoM rendering: HTML, PDF and DOCX for many meetings, one after another
+in this process, per format and for format_mom (all three from one
+parse), in meetings per second.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_render --mom data/final_mom.txt --meetings 200
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from mom_generator.mom_formatter import RENDERERS, format_mom, parse_mom
+
+FORMATS = ("html", "pdf", "docx")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--mom", default="data/final_mom.txt")
+    parser.add_argument("--meetings", type=int, default=200)
+    args = parser.parse_args()
+
+    with open(args.mom, "r", encoding="utf-8") as f:
+        mom_text = f.read()
+    sections = parse_mom(mom_text)
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        for fmt in FORMATS:
+            start = time.perf_counter()
+            for i in range(args.meetings):
+                RENDERERS[fmt](sections, os.path.join(out_dir, f"mom_{i}.{fmt}"))
+            seconds = time.perf_counter() - start
+            print(f"{fmt:<10} {seconds:>8.2f}s ({args.meetings / seconds:>7.1f} meetings/s)")
+
+        start = time.perf_counter()
+        for i in range(args.meetings):
+            format_mom(mom_text, {fmt: os.path.join(out_dir, f"mom_{i}.{fmt}") for fmt in FORMATS})
+        seconds = time.perf_counter() - start
+        print(f"format_mom {seconds:>8.2f}s ({args.meetings / seconds:>7.1f} meetings/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Built-in sentence splitter vs NLTK's sent_tokenize: agreement on a
+transcript (segment by segment) and throughput on synthetic transcripts.
+NLTK and its punkt data are only needed for this comparison; without
+them the built-in splitter is benchmarked alone.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_sentence_splitter --transcript data/cleaned_transcript.txt --lines 10000 100000
+"""
+import argparse
+import time
+
+from speaker_identification import split_into_segments
+from mom_generator.sentence_splitter import split_sentences_batch
+from benchmarks.synthetic import generate_transcript
+
+
+def load_nltk():
+    """NLTK's sent_tokenize, or None when NLTK or its punkt data is missing."""
+    try:
+        from nltk.tokenize import sent_tokenize
+
+        sent_tokenize("Ready. Go.")
+    except (ImportError, LookupError) as e:
+        print(f"NLTK unavailable ({type(e).__name__}); skipping the comparison.")
+        return None
+    return sent_tokenize
+
+
+def compare(segments, sent_tokenize):
+    """Prints every segment where the two splitters disagree; returns the agreement rate."""
+    ours = split_sentences_batch([text for _, text in segments])
+    same = 0
+    for (timestamp, text), mine in zip(segments, ours):
+        theirs = sent_tokenize(text)
+        if mine == theirs:
+            same += 1
+            continue
+        print(f"[{timestamp}]")
+        print(f"  nltk:     {theirs}")
+        print(f"  built-in: {mine}")
+    return same / len(segments) if segments else 1.0
+
+
+def _time(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def run(transcript_path, line_counts):
+    sent_tokenize = load_nltk()
+
+    if transcript_path and sent_tokenize:
+        with open(transcript_path, "r", encoding="utf-8") as f:
+            segments = split_into_segments(f.read())
+        rate = compare(segments, sent_tokenize)
+        print(f"Agreement with NLTK on {transcript_path}: {rate:.1%} of {len(segments)} segments\n")
+
+    print(f"{'lines':>8} {'MB':>7} {'built-in s':>11} {'nltk s':>9} {'speedup':>8}")
+    for num_lines in line_counts:
+        text = generate_transcript(num_lines=num_lines)
+        texts = [t for _, t in split_into_segments(text)]
+        ours, _ = _time(lambda: split_sentences_batch(texts))
+        row = f"{num_lines:>8} {len(text) / 1e6:>7.1f} {ours:>11.3f}"
+        if sent_tokenize:
+            theirs, _ = _time(lambda: [sent_tokenize(t) for t in texts])
+            row += f" {theirs:>9.3f} {theirs / ours:>7.1f}x"
+        print(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--transcript", default="data/cleaned_transcript.txt",
+                        help="Transcript to compare segment by segment.")
+    parser.add_argument("--lines", type=int, nargs="+", default=[10_000, 100_000],
+                        help="Synthetic transcript sizes in lines.")
+    args = parser.parse_args()
+    run(args.transcript, args.lines)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Import time of the pipeline entry points, each measured in a fresh
+interpreter, and which heavy dependencies the import pulled in. With
+lazy imports and a lazy OpenAI client, none of them should be loaded
+before the first stage runs (and no API key is needed to import).
+
+Usage (from the repository root):
+    python -m benchmarks.bench_startup --repeat 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+MODULES = ["main_pipeline", "batch_pipeline", "live_pipeline"]
+
+# Packages that should only load once the stage using them runs
+HEAVY = ["openai", "nltk", "fpdf", "pandas", "reportlab", "docx", "numpy"]
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": elapsed,
+    "loaded": [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+
+def measure(module, repeat):
+    env = dict(os.environ)
+    env.pop("OPENAI_API_KEY", None)
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY)],
+            capture_output=True, text=True, env=env, check=True,
+        ).stdout
+        runs.append(json.loads(out.strip().splitlines()[-1]))
+    return statistics.median(r["seconds"] for r in runs), runs[-1]["loaded"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--modules", nargs="+", default=MODULES)
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per module; median is kept.")
+    args = parser.parse_args()
+
+    print(f"{'module':<16} {'import ms':>10}  heavy packages loaded")
+    for module in args.modules:
+        seconds, loaded = measure(module, args.repeat)
+        print(f"{module:<16} {seconds * 1000:>10.1f}  {', '.join(loaded) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+End-to-end benchmark suite: every pipeline stage on synthetic transcripts
+of increasing size, with the LLM replaced by the offline FakeBackend (no
+latency, no rate limits, no cache). Records seconds, throughput and peak
+traced memory per stage and size to a JSON file; pass --compare with the
+file of an earlier commit to print the ratios.
+
+Usage (from the repository root):
+    python -m benchmarks.run_benchmarks --lines 1000 10000 100000 1000000 -o bench_results.json
+    python -m benchmarks.run_benchmarks --compare old_results.json -o new_results.json
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+# The benchmark measures the stages, never the response cache
+os.environ["MOM_LLM_CACHE"] = "0"
+
+from clean_transcript import (
+    chunk_text,
+    fix_grammar_concurrently,
+    load_filler_words,
+    remove_filler_words_preserving_structure,
+)
+from speaker_identification import (
+    assign_speakers,
+    split_into_segments,
+    split_segment_into_sentences,
+)
+from main_pipeline import FILLER_JSON_PATH, build_mom_lines
+from mom_generator.mom_extraction import extract_mom_sections_mapreduce
+from mom_generator.mom_formatter import format_mom, format_mom_docx, format_mom_html, format_mom_pdf
+from mom_generator.llm_backends import FakeBackend
+from mom_generator.llm_client import set_backend
+from mom_generator.llm_scheduler import configure_scheduler
+from benchmarks.synthetic import generate_transcript
+
+DEFAULT_LINES = [1_000, 10_000, 100_000, 1_000_000]
+
+# Stages that call the (fake) LLM, or format its output; they make one
+# call per few thousand tokens, so by default they stop at this size
+LLM_MAX_LINES = 100_000
+LLM_STAGES = {"grammar", "speakers", "extraction", "format_html", "format_pdf", "format_docx", "format_all"}
+
+UNLIMITED = (10 ** 9, 10 ** 12)
+
+
+def _stages(filler_words, out_dir):
+    """
+    (name, fn(state) -> result, key the result is stored under). Each
+    stage reads the outputs of the stages before it from `state`.
+    """
+    def mom_text(state):
+        return "\n".join(build_mom_lines(state["sections"]))
+
+    return [
+        ("filler_removal", lambda s: remove_filler_words_preserving_structure(s["raw"], filler_words), "cleaned"),
+        ("chunk_text", lambda s: chunk_text(s["cleaned"]), "chunks"),
+        ("split_into_segments", lambda s: split_into_segments(s["cleaned"]), "segments"),
+        ("sentence_split", lambda s: split_segment_into_sentences(s["segments"]), "sentences"),
+        ("grammar", lambda s: "\n".join(fix_grammar_concurrently(s["chunks"])), "corrected"),
+        ("speakers", lambda s: assign_speakers(s["corrected"]), "labeled"),
+        ("extraction", lambda s: extract_mom_sections_mapreduce(s["labeled"]), "sections"),
+        ("format_html", lambda s: format_mom_html(mom_text(s), os.path.join(out_dir, "mom.html")), None),
+        ("format_pdf", lambda s: format_mom_pdf(mom_text(s), os.path.join(out_dir, "mom.pdf")), None),
+        ("format_docx", lambda s: format_mom_docx(mom_text(s), os.path.join(out_dir, "mom.docx")), None),
+        ("format_all", lambda s: format_mom(mom_text(s), {
+            fmt: os.path.join(out_dir, f"mom_all.{fmt}") for fmt in ("html", "pdf", "docx")
+        }), None),
+    ]
+
+
+def _run_stage(fn, state, trace_memory):
+    gc.collect()
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        result = fn(state)
+    seconds = time.perf_counter() - start
+    peak = None
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return result, seconds, peak
+
+
+def bench_size(num_lines, filler_words, trace_memory, llm_max_lines):
+    raw = generate_transcript(num_lines=num_lines)
+    state = {"raw": raw}
+    records = []
+    with tempfile.TemporaryDirectory() as out_dir:
+        for name, fn, key in _stages(filler_words, out_dir):
+            if name in LLM_STAGES and num_lines > llm_max_lines:
+                records.append({"lines": num_lines, "stage": name, "skipped": True})
+                continue
+            result, seconds, _ = _run_stage(fn, state, trace_memory=False)
+            peak = None
+            if trace_memory:
+                # Separate run: tracing slows the stage down
+                _, _, peak = _run_stage(fn, state, trace_memory=True)
+            if key:
+                state[key] = result
+            records.append({
+                "lines": num_lines,
+                "bytes": len(raw),
+                "stage": name,
+                "seconds": round(seconds, 4),
+                "lines_per_s": round(num_lines / seconds, 1) if seconds else None,
+                "mb_per_s": round(len(raw) / 1e6 / seconds, 3) if seconds else None,
+                "peak_mb": round(peak / 1e6, 2) if peak is not None else None,
+            })
+            print(
+                f"{num_lines:>9} {name:<20} {seconds:>9.3f}s"
+                + (f" {peak / 1e6:>9.1f} MB peak" if peak is not None else "")
+            )
+    return records
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old_path, records):
+    with open(old_path, "r", encoding="utf-8") as f:
+        old = {(r["lines"], r["stage"]): r for r in json.load(f)["results"]}
+    print(f"\nvs {old_path} (time ratio new/old, < 1 is faster)")
+    for r in records:
+        prev = old.get((r["lines"], r["stage"]))
+        if r.get("skipped") or not prev or prev.get("skipped") or not prev["seconds"]:
+            continue
+        print(f"{r['lines']:>9} {r['stage']:<20} {r['seconds'] / prev['seconds']:>7.2f}x")
+
+
+def run(line_counts, output_path, filler_json_path, trace_memory=True,
+        llm_max_lines=LLM_MAX_LINES, compare_path=None):
+    set_backend(FakeBackend(latency=0, jitter=0, tokens_per_second=0))
+    configure_scheduler(limits={m: UNLIMITED for m in ("gpt-4", "gpt-4o-mini")})
+    filler_words = load_filler_words(filler_json_path)
+
+    records = []
+    for num_lines in line_counts:
+        records.extend(bench_size(num_lines, filler_words, trace_memory, llm_max_lines))
+
+    results = {
+        "commit": _git_commit(),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "results": records,
+    }
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results: {output_path}")
+
+    if compare_path:
+        compare(compare_path, records)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lines", type=int, nargs="+", default=DEFAULT_LINES,
+                        help="Synthetic transcript sizes in lines.")
+    parser.add_argument("-o", "--output", default="bench_results.json", help="JSON results file.")
+    parser.add_argument("--filler-words", default=FILLER_JSON_PATH)
+    parser.add_argument("--llm-max-lines", type=int, default=LLM_MAX_LINES,
+                        help="Largest size for the stages that call the fake LLM.")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc runs.")
+    parser.add_argument("--compare", help="Earlier results file to compare against.")
+    args = parser.parse_args()
+    run(args.lines, args.output, args.filler_words, not args.no_memory,
+        args.llm_max_lines, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Synthetic transcripts in the data/transcript.txt format: one
+"MM:SS text" line per segment, two or more speakers' worth of
+conversational sentences, with filler words sprinkled in.
+"""
+import random
+
+FILLERS = ["um", "uh", "Uh", "Okay", "Yeah", "Mm-hmm", "Sure", "Umm"]
+
+SENTENCES = [
+    "Hi, good morning, how are you",
+    "I'm good, what about you",
+    "So can we start the call",
+    "I have around 2.5 years of experience with Python and SQL",
+    "We need a product that can create the minutes of meeting",
+    "Can you explain a little bit more about the LLM models",
+    "The data will be stored for around 30 days before cleaning",
+    "I will send the architecture document by Friday",
+    "Do we need to purchase any membership for these tools",
+    "We should finalize the ETL pipeline and the Power BI dashboard",
+    "That sounds good to me",
+    "What will the deadline be like",
+    "It will take around one month to complete the first phase",
+    "Let's meet again next week to review the Jira tickets",
+]
+
+
+def _timestamp(seconds):
+    return f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+
+def make_line(rng, seconds):
+    parts = []
+    for _ in range(rng.randint(1, 4)):
+        sentence = rng.choice(SENTENCES)
+        if rng.random() < 0.4:
+            sentence = f"{rng.choice(FILLERS)}, {sentence[0].lower()}{sentence[1:]}"
+        parts.append(sentence + rng.choice([".", ".", "?", "."]))
+    return f"{_timestamp(seconds)} {' '.join(parts)}"
+
+
+def generate_lines(num_lines, seed=0):
+    """Yields `num_lines` transcript lines with increasing timestamps."""
+    rng = random.Random(seed)
+    seconds = 0
+    for _ in range(num_lines):
+        yield make_line(rng, seconds % 6000)
+        seconds += rng.randint(3, 20)
+
+
+def generate_transcript(num_lines=None, num_bytes=None, seed=0):
+    """
+    Returns a transcript of `num_lines` lines, or of roughly `num_bytes`
+    characters. Large sizes repeat a pool of pre-built lines so generation
+    stays fast.
+    """
+    if num_lines is not None:
+        return "\n".join(generate_lines(num_lines, seed)) + "\n"
+
+    pool = list(generate_lines(2000, seed))
+    average = sum(len(line) + 1 for line in pool) / len(pool)
+    count = max(1, int(num_bytes / average))
+    rng = random.Random(seed)
+    lines = (pool[rng.randrange(len(pool))] for _ in range(count))
+    return "\n".join(lines) + "\n"
@@ -1,14 +1,19 @@
+import io
 import os
 import re
 import json
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from openai import OpenAI
+from mom_generator.llm_client import chat_completion
+from mom_generator.checkpoint import hash_inputs
+from mom_generator.chunking import chunk_by_tokens
 
 # -------------------------------------------------------
 # LOAD API KEY
 # -------------------------------------------------------
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 # -------------------------------------------------------
 # FILE PATHS
@@ -17,6 +22,19 @@ FILLER_JSON_PATH = "filler_words.json"
 INPUT_TRANSCRIPT_PATH = "transcript.txt"
 OUTPUT_TRANSCRIPT_PATH = "cleaned_transcript.txt"
 
+GRAMMAR_MODEL = "gpt-4o-mini"
+
+# Part of the checkpoint keys: bump when the filler remover's output or
+# the grammar prompt changes, so results of the old code are not reused
+CLEANER_VERSION = 2
+GRAMMAR_VERSION = 1
+
+# Estimated tokens per grammar chunk (the reply is about as long as the chunk)
+GRAMMAR_CHUNK_TOKENS = int(os.getenv("GRAMMAR_CHUNK_TOKENS", "2000"))
+
+# Max number of grammar requests in flight at once
+GRAMMAR_MAX_WORKERS = int(os.getenv("GRAMMAR_MAX_WORKERS", "4"))
+
 # -------------------------------------------------------
 # LOADERS & SAVERS
 # -------------------------------------------------------
@@ -46,55 +64,125 @@ def build_filler_pattern(filler_words):
 
 
 # -------------------------------------------------------
-# FILLER WORD CLEANING
+# FILLER WORD CLEANING (single-pass engine)
 # -------------------------------------------------------
+_SCANNER_CACHE = {}
+
+_SENTENCE_END = ".!?"
+
+
+def filler_list_hash(filler_words):
+    """Stable hash of a filler list, independent of order and case."""
+    normalized = sorted({w.lower() for w in filler_words})
+    return hashlib.sha1("\n".join(normalized).encode("utf-8")).hexdigest()
+
+
+def compile_filler_scanner(filler_words):
+    """
+    Builds (once per filler list) the tokenizer used by
+    remove_filler_words_preserving_structure. Tokens are tried in order:
+    timestamps, filler words, whitespace, punctuation, runs of ordinary
+    words joined by single spaces, and any other single character.
+    """
+    key = filler_list_hash(filler_words)
+    scanner = _SCANNER_CACHE.get(key)
+    if scanner is not None:
+        return scanner
+
+    # Longest first so the alternation prefers "Uhh" over "Uh"
+    words = sorted({w.lower() for w in filler_words}, key=len, reverse=True)
+    fillers = "(?:" + "|".join(re.escape(w) for w in words) + r")\b"
+    # A plain word may not start a filler or a timestamp
+    plain = rf"(?!{fillers}|\d+:\d)\w+"
+    scanner = re.compile(
+        rf"(?P<ts>\d+:\d+)"
+        rf"|(?P<filler>\b{fillers})"
+        rf"|(?P<ws>\s+)"
+        rf"|(?P<punct>[,.!?;:])"
+        rf"|(?P<text>{plain}(?: {plain})*)"
+        rf"|(?P<other>.)",
+        flags=re.IGNORECASE | re.DOTALL,
+    )
+    _SCANNER_CACHE[key] = scanner
+    return scanner
+
+
 def remove_filler_words_preserving_structure(text, filler_words):
     """
     Removes filler words but preserves:
     - punctuation
     - timestamps
     - casing
+
+    One linear scan: timestamps are copied through untouched, fillers are
+    dropped, whitespace before punctuation is removed, runs of spaces are
+    collapsed, ", " after "?" / "." (and doubled commas) left behind by a
+    removed filler are dropped, and sentence starts are capitalized.
     """
 
     if not filler_words:
         return text
 
-    # Protect timestamps
-    timestamps = re.findall(r"\d+:\d+", text)
-    temp_map = {ts: f"__TS_{i}__" for i, ts in enumerate(timestamps)}
-
-    # Replace timestamps with placeholders
-    for ts, placeholder in temp_map.items():
-        text = text.replace(ts, placeholder)
-
-    # Remove filler words
-    filler_pattern = build_filler_pattern(filler_words)
-    text = filler_pattern.sub("", text)
-
-    # Clean spacing & punctuation
-    text = re.sub(r"[ ]{2,}", " ", text)
-    text = re.sub(r"\s+([,.!?;:])", r"\1", text)
-    text = re.sub(r"\?\s*,\s*", "? ", text)
-    text = re.sub(r"\.\s*,\s*", ". ", text)
-
-    # Capitalize sentences
-    text = re.sub(
-        r"(^|[.!?]\s+)([a-z])",
-        lambda m: m.group(1) + m.group(2).upper(),
-        text,
-    )
-
-    # Restore timestamps
-    for ts, placeholder in temp_map.items():
-        text = text.replace(placeholder, ts)
-
-    return text.strip()
+    scanner = compile_filler_scanner(filler_words)
+    out = io.StringIO()
+    write = out.write
+    started = False  # anything emitted yet (leading whitespace is dropped)
+    pending_ws = ""  # whitespace seen since the last emitted token
+    last = ""  # last emitted character
+    force_space = False  # a ", " after "?" / "." was dropped
+
+    for m in scanner.finditer(text):
+        kind = m.lastgroup
+        if kind == "filler":
+            continue
+        token = m.group()
+        if kind == "ws":
+            pending_ws += token
+            continue
+
+        if kind == "punct":
+            # Whitespace before punctuation is dropped
+            pending_ws = ""
+            if token == "," and last in ("?", "."):
+                force_space = True
+                continue
+            if token == "," and last == ",":
+                continue
+            force_space = False
+            write(token)
+            started = True
+            last = token
+            continue
+
+        if force_space:
+            # Keep line structure: never join the next timestamp line
+            ws = "\n" if "\n" in pending_ws else " "
+            force_space = False
+        elif pending_ws == " " or "  " not in pending_ws:
+            ws = pending_ws
+        else:
+            ws = re.sub(r"[ ]{2,}", " ", pending_ws)
+        pending_ws = ""
+
+        if kind == "text" and "a" <= token[0] <= "z" and (
+            (not started and not ws) or (ws and last and last in _SENTENCE_END)
+        ):
+            token = token[0].upper() + token[1:]
+
+        if started:
+            write(ws)
+        write(token)
+        started = True
+        last = token[-1]
+
+    return out.getvalue().strip()
 
 
 # -------------------------------------------------------
 # GRAMMAR FIX USING gpt-4o-mini (STRICT MODE)
 # -------------------------------------------------------
-def fix_grammar_with_openai(text):
+def request_grammar_fix(text):
+    """Sends one grammar request; raises on any API error."""
     prompt = f"""
 Fix ONLY grammar, punctuation, and sentence boundaries in the transcript below.
 
@@ -112,13 +200,18 @@ Transcript:
 {text}
 """
 
+    content = chat_completion(
+        model=GRAMMAR_MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        task="grammar",
+        temperature=0,
+    )
+    return content.strip()
+
+
+def fix_grammar_with_openai(text):
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0,
-        )
-        return response.choices[0].message.content.strip()
+        return request_grammar_fix(text)
 
     except Exception as e:
         print("OpenAI Error:", e)
@@ -127,25 +220,79 @@ Transcript:
 
 
 # -------------------------------------------------------
-# CHUNK LONG TEXTS (if needed)
+# CONCURRENT GRAMMAR FIX (ordered reassembly)
 # -------------------------------------------------------
-def chunk_text(text, max_chars=9000):
-    """Splits text safely for long transcripts."""
-    if len(text) <= max_chars:
-        return [text]
+def _timed_grammar_fix(index, chunk, checkpoints=None):
+    start = time.perf_counter()
+    if checkpoints is None:
+        corrected = fix_grammar_with_openai(chunk)
+        return index, corrected, time.perf_counter() - start
+
+    key = hash_inputs(GRAMMAR_VERSION, chunk, GRAMMAR_MODEL)
+    corrected = checkpoints.load("grammar", key)
+    if corrected is None:
+        try:
+            corrected = request_grammar_fix(chunk)
+            checkpoints.save("grammar", key, corrected)
+        except Exception as e:
+            # Not checkpointed, so the next run retries this chunk
+            print("OpenAI Error:", e)
+            print("Returning uncorrected text.")
+            corrected = chunk
+    return index, corrected, time.perf_counter() - start
+
+
+def fix_grammar_concurrently(chunks, max_workers=None, checkpoints=None):
+    """
+    Runs fix_grammar_with_openai over all chunks with at most
+    `max_workers` requests in flight.
+    Returns the corrected chunks in their original order; a chunk whose
+    request fails falls back to its uncorrected text.
+    With a CheckpointStore, corrected chunks are saved as they finish and
+    reloaded on the next run; failed chunks are retried.
+    """
+    if not chunks:
+        return []
+
+    max_workers = max(1, min(max_workers or GRAMMAR_MAX_WORKERS, len(chunks)))
+    corrected = [None] * len(chunks)
+    latencies = [0.0] * len(chunks)
+
+    stage_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [
+            pool.submit(_timed_grammar_fix, i, chunk, checkpoints)
+            for i, chunk in enumerate(chunks)
+        ]
+        for future in futures:
+            index, text, elapsed = future.result()
+            corrected[index] = text
+            latencies[index] = elapsed
+    stage_elapsed = time.perf_counter() - stage_start
+
+    for i, elapsed in enumerate(latencies):
+        print(f"  chunk {i + 1}/{len(chunks)}: {elapsed:.2f}s")
+    print(
+        f"Grammar stage: {stage_elapsed:.2f}s wall "
+        f"(slowest chunk {max(latencies):.2f}s, "
+        f"sum of chunks {sum(latencies):.2f}s, workers={max_workers})"
+    )
 
-    parts = []
-    while len(text) > max_chars:
-        split_idx = text.rfind("\n", 0, max_chars)
-        if split_idx == -1:
-            split_idx = max_chars
-        parts.append(text[:split_idx])
-        text = text[split_idx:]
+    return corrected
 
-    if text.strip():
-        parts.append(text)
 
-    return parts
+# -------------------------------------------------------
+# CHUNK LONG TEXTS (if needed)
+# -------------------------------------------------------
+def chunk_text(text, *, max_tokens=None, overlap=0):
+    """
+    Splits text safely for long transcripts: whole timestamp segments,
+    up to `max_tokens` estimated tokens per chunk. The budget is
+    keyword-only: the second positional argument used to be a limit in
+    characters (max_chars), and such a call now fails instead of being
+    read as tokens.
+    """
+    return chunk_by_tokens(text, max_tokens or GRAMMAR_CHUNK_TOKENS, overlap)
 
 
 # -------------------------------------------------------
@@ -162,7 +309,7 @@ def main():
     chunks = chunk_text(cleaned_text)
 
     print("Correcting grammar using gpt-4o-mini...")
-    corrected_chunks = [fix_grammar_with_openai(chunk) for chunk in chunks]
+    corrected_chunks = fix_grammar_concurrently(chunks)
     final_text = "\n".join(corrected_chunks)
 
     print("Saving cleaned transcript...")
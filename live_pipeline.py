@@ -0,0 +1,262 @@
+import argparse
+import os
+import re
+import sys
+import time
+
+from clean_transcript import (
+    chunk_text,
+    fix_grammar_concurrently,
+    load_filler_words,
+    remove_filler_words_preserving_structure,
+)
+from speaker_identification import assign_speakers
+from mom_generator.mom_extraction import extract_mom_sections_mapreduce
+from mom_generator.mom_formatter import format_mom
+from mom_generator.transcript_model import Transcript
+from main_pipeline import (
+    CLEANED_TRANSCRIPT_NAME,
+    DOCX_MOM_NAME,
+    FILLER_JSON_PATH,
+    FINAL_MOM_NAME,
+    HTML_MOM_NAME,
+    OUTPUT_DIR,
+    PDF_MOM_NAME,
+    RAW_TRANSCRIPT,
+    SPEAKER_LABELED_TRANSCRIPT_NAME,
+    build_mom_lines,
+)
+
+DRAFT_MOM_NAME = "final_mom_draft.txt"
+
+# A new segment starts with a timestamp at the beginning of a line
+SEGMENT_START = re.compile(r"^\d{1,2}:\d{2}", flags=re.M)
+
+
+# -------------------------------------------------------
+# FILE TAILING
+# -------------------------------------------------------
+class TranscriptTail:
+    """
+    Reads text appended to a transcript file since the last call and
+    hands back only complete timestamp segments. The last segment is held
+    back until the next timestamp arrives (or flush() is called), because
+    the speaker may still be talking.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self.pending = ""
+
+    def poll(self):
+        if not os.path.exists(self.path):
+            return ""
+        size = os.path.getsize(self.path)
+        if size < self.offset:
+            # File was truncated or replaced: start over
+            self.offset = 0
+            self.pending = ""
+        if size == self.offset:
+            return ""
+
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read()
+        # Only consume whole lines so multi-byte characters are never split
+        end = data.rfind(b"\n") + 1
+        if end == 0:
+            return ""
+        self.offset += end
+        self.pending += data[:end].decode("utf-8")
+
+        starts = [m.start() for m in SEGMENT_START.finditer(self.pending)]
+        if len(starts) < 2:
+            return ""
+        complete, self.pending = self.pending[:starts[-1]], self.pending[starts[-1]:]
+        return complete
+
+    def flush(self):
+        """Everything not handed out yet, including a last line with no newline."""
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                f.seek(self.offset)
+                data = f.read()
+            self.offset += len(data)
+            self.pending += data.decode("utf-8")
+        rest, self.pending = self.pending, ""
+        return rest
+
+
+# -------------------------------------------------------
+# INCREMENTAL PIPELINE
+# -------------------------------------------------------
+class LivePipeline:
+    """
+    Runs filler removal, grammar correction and speaker labeling on each
+    batch of new segments only, appends the results to the rolling
+    transcripts and refreshes a draft MoM at most every `draft_interval`
+    seconds.
+    """
+
+    def __init__(self, output_dir, filler_words, draft_interval=60.0):
+        self.output_dir = output_dir
+        self.filler_words = filler_words
+        self.draft_interval = draft_interval
+        self.cleaned_parts = []
+        self.labeled_parts = []
+        self.seen_items = set()
+        self.last_draft = 0.0
+        self.draft_stale = False
+        os.makedirs(output_dir, exist_ok=True)
+
+    def _path(self, name):
+        return os.path.join(self.output_dir, name)
+
+    def process(self, new_text):
+        if not new_text.strip():
+            return
+        cleaned = remove_filler_words_preserving_structure(new_text, self.filler_words)
+        corrected = "\n".join(fix_grammar_concurrently(chunk_text(cleaned)))
+        with open(self._path(CLEANED_TRANSCRIPT_NAME), "a", encoding="utf-8") as f:
+            f.write(corrected + "\n")
+
+        # Labeled lines are written as each label is settled, while the
+        # LLM replies for the rest of the chunk are still streaming in
+        with open(self._path(SPEAKER_LABELED_TRANSCRIPT_NAME), "a", encoding="utf-8") as f:
+            def on_line(line):
+                f.write(line + "\n")
+                f.flush()
+
+            # The end of the previous chunk keeps Speaker 1 / Speaker 2
+            # meaning the same people across chunks
+            labeled = assign_speakers(corrected, on_line=on_line, context_segments=self.last_labeled())
+
+        self.cleaned_parts.append(corrected)
+        self.labeled_parts.append(labeled)
+        self.draft_stale = True
+        print(f"Processed {len(SEGMENT_START.findall(new_text))} new segments.")
+
+    def last_labeled(self):
+        """The most recent labeled chunk, or None before the first one."""
+        return next((part for part in reversed(self.labeled_parts) if part), None)
+
+    def labeled_transcript(self):
+        return Transcript.concat(part for part in self.labeled_parts if part)
+
+    def _on_item(self, section, line):
+        """Prints draft bullets as extraction streams them, each only once."""
+        if (section, line) not in self.seen_items:
+            self.seen_items.add((section, line))
+            print(f"[{section}] {line}")
+
+    def maybe_refresh_draft(self, force=False):
+        if not self.draft_stale:
+            return None
+        if not force and time.monotonic() - self.last_draft < self.draft_interval:
+            return None
+        sections = extract_mom_sections_mapreduce(self.labeled_transcript(), on_item=self._on_item)
+        mom_text = "\n".join(build_mom_lines(sections))
+        with open(self._path(DRAFT_MOM_NAME), "w", encoding="utf-8") as f:
+            f.write(mom_text)
+        self.last_draft = time.monotonic()
+        self.draft_stale = False
+        print(f"Draft MoM updated: {self._path(DRAFT_MOM_NAME)}")
+        return mom_text
+
+    def finalize(self):
+        mom_text = self.maybe_refresh_draft(force=True)
+        if mom_text is None:
+            draft_path = self._path(DRAFT_MOM_NAME)
+            if not os.path.exists(draft_path):
+                return None
+            with open(draft_path, "r", encoding="utf-8") as f:
+                mom_text = f.read()
+
+        final_mom_path = self._path(FINAL_MOM_NAME)
+        with open(final_mom_path, "w", encoding="utf-8") as f:
+            f.write(mom_text)
+        outputs = format_mom(mom_text, {
+            "html": self._path(HTML_MOM_NAME),
+            "pdf": self._path(PDF_MOM_NAME),
+            "docx": self._path(DOCX_MOM_NAME),
+        }, transcript=self._path(SPEAKER_LABELED_TRANSCRIPT_NAME))
+        return {"text": final_mom_path, **outputs}
+
+
+def reset_outputs(output_dir):
+    for name in (CLEANED_TRANSCRIPT_NAME, SPEAKER_LABELED_TRANSCRIPT_NAME, DRAFT_MOM_NAME):
+        path = os.path.join(output_dir, name)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+# -------------------------------------------------------
+# MAIN PROCESS
+# -------------------------------------------------------
+def run_live(transcript_path, output_dir=OUTPUT_DIR, filler_json_path=FILLER_JSON_PATH,
+             poll_interval=1.0, idle_timeout=30.0, draft_interval=60.0):
+    """
+    Watches `transcript_path` until no new text has arrived for
+    `idle_timeout` seconds (or Ctrl+C), then writes the final MoM.
+    """
+    tail = TranscriptTail(transcript_path)
+    reset_outputs(output_dir)
+    live = LivePipeline(output_dir, load_filler_words(filler_json_path), draft_interval)
+    last_growth = time.monotonic()
+
+    print(f"Watching {transcript_path} (Ctrl+C to finish)...")
+    try:
+        while True:
+            offset = tail.offset
+            live.process(tail.poll())
+            if tail.offset != offset:
+                last_growth = time.monotonic()
+            elif time.monotonic() - last_growth >= idle_timeout:
+                print("No new transcript text, finishing meeting.")
+                break
+            live.maybe_refresh_draft()
+            time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        print("Stopping, finishing meeting.")
+
+    live.process(tail.poll() + tail.flush())
+    return live.finalize()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Build the MoM incrementally while a transcript is still being written."
+    )
+    parser.add_argument("transcript", nargs="?", default=RAW_TRANSCRIPT, help="Transcript file to watch.")
+    parser.add_argument("-o", "--output-dir", default=OUTPUT_DIR, help="Folder for outputs.")
+    parser.add_argument("--filler-words", default=FILLER_JSON_PATH, help="Path to filler_words.json.")
+    parser.add_argument("--poll", type=float, default=1.0, help="Seconds between file checks.")
+    parser.add_argument(
+        "--idle-timeout", type=float, default=30.0,
+        help="Finish once the file has not grown for this many seconds.",
+    )
+    parser.add_argument(
+        "--draft-interval", type=float, default=60.0,
+        help="Minimum seconds between draft MoM refreshes.",
+    )
+    args = parser.parse_args(argv)
+
+    outputs = run_live(
+        args.transcript, args.output_dir, args.filler_words,
+        args.poll, args.idle_timeout, args.draft_interval,
+    )
+    if not outputs:
+        print("No transcript content received.")
+        return 1
+
+    print(f"Pipeline Complete!")
+    print(f"Text MoM: {outputs['text']}")
+    print(f"HTML: {outputs['html']} (email-ready)")
+    print(f"PDF: {outputs['pdf']} (professional)")
+    print(f"DOCX: {outputs['docx']} (editable)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,60 +1,161 @@
+import os
+import time
+
+# Import start of the pipeline, for the time-to-first-work report
+_IMPORT_START = time.perf_counter()
+_startup_reported = False
+
 from clean_transcript import *
 from speaker_identification import assign_speakers
-from mom_generator.mom_extraction import (
-    extract_action_items,
-    extract_decisions,
-    extract_questions,
-    summarize_discussion,
-)
-from mom_generator.mom_formatter import format_mom_html, format_mom_pdf
+from mom_generator.mom_extraction import extract_mom_sections_mapreduce
+from mom_generator.mom_formatter import format_mom
+from mom_generator.llm_cache import get_cache
+from mom_generator.checkpoint import get_checkpoint_store, hash_inputs
+from mom_generator.metrics import MetricsRecorder, set_metrics
+from mom_generator.llm_routing import get_routing_stats
+from mom_generator.relevance import get_relevance_stats
+from mom_generator.transcript_model import Transcript
 
 RAW_TRANSCRIPT = "data/transcript.txt"
-CLEANED_TRANSCRIPT = "data/cleaned_transcript.txt"
-SPEAKER_LABELED_TRANSCRIPT = "data/speaker_labeled_transcript.txt"
+OUTPUT_DIR = "data"
 FILLER_JSON_PATH = "data/filler_words.json"
-FINAL_MOM_PATH = "data/final_mom.txt"
-
-# Step 1: Clean transcript
-filler_words = load_filler_words(FILLER_JSON_PATH)
-raw_text = load_transcript(RAW_TRANSCRIPT)
-cleaned_text = remove_filler_words_preserving_structure(raw_text, filler_words)
-chunks = chunk_text(cleaned_text)
-corrected_chunks = [fix_grammar_with_openai(chunk) for chunk in chunks]
-final_cleaned_text = "\n".join(corrected_chunks)
-save_clean_transcript(final_cleaned_text, CLEANED_TRANSCRIPT)
-print(f"Cleaned transcript saved: {CLEANED_TRANSCRIPT}")
-
-# Step 2: Speaker Identification
-speaker_labeled_text = assign_speakers(final_cleaned_text)
-with open(SPEAKER_LABELED_TRANSCRIPT, "w", encoding="utf-8") as f:
-    f.write(speaker_labeled_text)
-print(f"Speaker-labeled transcript saved: {SPEAKER_LABELED_TRANSCRIPT}")
-
-# Step 3: MoM Extraction
-summary = summarize_discussion(speaker_labeled_text)
-actions = extract_action_items(speaker_labeled_text)
-decisions = extract_decisions(speaker_labeled_text)
-questions = extract_questions(speaker_labeled_text)
-
-mom_lines = []
-mom_lines.append("SUMMARY:")
-mom_lines.append(summary)
-mom_lines.append("\nACTION ITEMS:")
-mom_lines.extend(actions)
-mom_lines.append("\nDECISIONS:")
-mom_lines.extend(decisions)
-mom_lines.append("\nQUESTIONS / ISSUES:")
-mom_lines.extend(questions)
-
-with open(FINAL_MOM_PATH, "w", encoding="utf-8") as f:
-    f.write("\n".join(mom_lines))
-
-# Generate professional formats
-mom_content = "\n".join(mom_lines)
-html_path = format_mom_html(mom_content)
-pdf_path = format_mom_pdf(mom_content)
-
-print(f"Pipeline Complete!")
-print(f"Text MoM: {FINAL_MOM_PATH}")
-print(f"HTML: {html_path} (email-ready)")
-print(f"PDF: {pdf_path} (professional)")
\ No newline at end of file
+
+# Output file names, written inside the output directory
+CLEANED_TRANSCRIPT_NAME = "cleaned_transcript.txt"
+SPEAKER_LABELED_TRANSCRIPT_NAME = "speaker_labeled_transcript.txt"
+FINAL_MOM_NAME = "final_mom.txt"
+HTML_MOM_NAME = "mom_final.html"
+PDF_MOM_NAME = "mom_final.pdf"
+DOCX_MOM_NAME = "mom_final.docx"
+
+
+def build_mom_lines(sections):
+    mom_lines = []
+    mom_lines.append("SUMMARY:")
+    mom_lines.append(sections["summary"])
+    mom_lines.append("\nACTION ITEMS:")
+    mom_lines.extend(sections["action_items"])
+    mom_lines.append("\nDECISIONS:")
+    mom_lines.extend(sections["decisions"])
+    mom_lines.append("\nQUESTIONS / ISSUES:")
+    mom_lines.extend(sections["questions"])
+    return mom_lines
+
+
+def report_startup():
+    """Prints, once per process, the time from importing the pipeline to its first stage."""
+    global _startup_reported
+    if not _startup_reported:
+        _startup_reported = True
+        elapsed = time.perf_counter() - _IMPORT_START
+        print(f"Startup: {elapsed * 1000:.0f} ms to first stage")
+
+
+def run_pipeline(raw_transcript_path, output_dir=OUTPUT_DIR, filler_json_path=FILLER_JSON_PATH):
+    """
+    Runs clean → speaker → extract → format for one transcript.
+    Every finished unit of work is checkpointed, so a re-run after a
+    failure skips straight to the unit that failed.
+    Per-stage and per-call metrics are written to the output directory
+    (mom_generator/metrics.py; MOM_PROFILE=1 / MOM_TRACEMALLOC=1 add
+    profiling around every stage).
+    Returns a dict of the output file paths.
+    """
+    report_startup()
+    checkpoints = get_checkpoint_store()
+    os.makedirs(output_dir, exist_ok=True)
+    cleaned_path = os.path.join(output_dir, CLEANED_TRANSCRIPT_NAME)
+    labeled_path = os.path.join(output_dir, SPEAKER_LABELED_TRANSCRIPT_NAME)
+    final_mom_path = os.path.join(output_dir, FINAL_MOM_NAME)
+    metrics = MetricsRecorder(profile_dir=output_dir)
+    set_metrics(metrics)
+
+    try:
+        # Step 1: Clean transcript
+        with metrics.stage("clean"):
+            filler_words = load_filler_words(filler_json_path)
+            raw_text = load_transcript(raw_transcript_path)
+            cleaned_text = None
+            if checkpoints is not None:
+                clean_key = hash_inputs(CLEANER_VERSION, raw_text, filler_words)
+                cleaned_text = checkpoints.load("cleaned", clean_key)
+            if cleaned_text is None:
+                cleaned_text = remove_filler_words_preserving_structure(raw_text, filler_words)
+                if checkpoints is not None:
+                    checkpoints.save("cleaned", clean_key, cleaned_text)
+            chunks = chunk_text(cleaned_text)
+
+        with metrics.stage("grammar"):
+            corrected_chunks = fix_grammar_concurrently(chunks, checkpoints=checkpoints)
+            final_cleaned_text = "\n".join(corrected_chunks)
+            save_clean_transcript(final_cleaned_text, cleaned_path)
+        print(f"Cleaned transcript saved: {cleaned_path}")
+
+        # Step 2: Speaker Identification
+        with metrics.stage("speakers"):
+            # Parsed once; the stages after this pass the Transcript along
+            speaker_labeled = assign_speakers(Transcript.parse(final_cleaned_text), checkpoints=checkpoints)
+            with open(labeled_path, "w", encoding="utf-8") as f:
+                f.write(speaker_labeled.to_text())
+        print(f"Speaker-labeled transcript saved: {labeled_path}")
+
+        # Step 3: MoM Extraction
+        with metrics.stage("extraction"):
+            sections = extract_mom_sections_mapreduce(speaker_labeled, checkpoints=checkpoints)
+            mom_lines = build_mom_lines(sections)
+
+            with open(final_mom_path, "w", encoding="utf-8") as f:
+                f.write("\n".join(mom_lines))
+
+        # Generate professional formats, all from one parse of the MoM;
+        # the PDF streams the labeled transcript file in as an appendix
+        with metrics.stage("format"):
+            formatted = format_mom("\n".join(mom_lines), {
+                "html": os.path.join(output_dir, HTML_MOM_NAME),
+                "pdf": os.path.join(output_dir, PDF_MOM_NAME),
+                "docx": os.path.join(output_dir, DOCX_MOM_NAME),
+            }, transcript=labeled_path)
+    finally:
+        set_metrics(None)
+        # Also written when a stage fails, to show how far the run got
+        metrics_path = metrics.write(output_dir)
+
+    print(metrics.summary())
+    print(get_routing_stats().report())
+    print(get_relevance_stats().report())
+    print(f"Metrics saved: {metrics_path}")
+    if checkpoints is not None:
+        print(f"Checkpoints: {checkpoints.loaded} reused, {checkpoints.saved} saved")
+
+    return {
+        "cleaned": cleaned_path,
+        "labeled": labeled_path,
+        "text": final_mom_path,
+        "html": formatted["html"],
+        "pdf": formatted["pdf"],
+        "docx": formatted["docx"],
+        "metrics": metrics_path,
+    }
+
+
+def print_cache_stats():
+    cache = get_cache()
+    if cache is not None:
+        stats = cache.stats()
+        print(
+            f"LLM cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate']:.0%} hit rate, {stats['entries']} entries, "
+            f"{stats['bytes'] / 1024:.0f} KiB)"
+        )
+
+
+if __name__ == "__main__":
+    outputs = run_pipeline(RAW_TRANSCRIPT)
+
+    print(f"Pipeline Complete!")
+    print(f"Text MoM: {outputs['text']}")
+    print(f"HTML: {outputs['html']} (email-ready)")
+    print(f"PDF: {outputs['pdf']} (professional)")
+    print(f"DOCX: {outputs['docx']} (editable)")
+
+    print_cache_stats()
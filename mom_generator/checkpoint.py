@@ -0,0 +1,65 @@
+# checkpoint.py
+import hashlib
+import json
+import os
+import threading
+from typing import Optional
+
+DEFAULT_CHECKPOINT_DIR = os.getenv("MOM_CHECKPOINT_DIR", "data/.cache/checkpoints")
+
+
+def hash_inputs(*parts) -> str:
+    """sha256 over the JSON form of everything a unit of work depends on."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# -----------------------------
+# CHECKPOINT STORE
+# -----------------------------
+
+class CheckpointStore:
+    """
+    Saves the result of each finished unit of work (a stage, a chunk, a
+    batch) as JSON under <root>/<stage>/<key>.json, where the key is
+    hash_inputs() of the unit's inputs and configuration. A re-run loads
+    every unit whose key is unchanged and only recomputes the rest.
+    """
+
+    def __init__(self, root: str = DEFAULT_CHECKPOINT_DIR):
+        self.root = root
+        self.loaded = 0
+        self.saved = 0
+        self._lock = threading.Lock()
+
+    def _path(self, stage: str, key: str) -> str:
+        return os.path.join(self.root, stage, key[:2], f"{key}.json")
+
+    def load(self, stage: str, key: str):
+        """Returns the saved value, or None if this unit has not finished before."""
+        try:
+            with open(self._path(stage, key), "r", encoding="utf-8") as f:
+                value = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        with self._lock:
+            self.loaded += 1
+        return value
+
+    def save(self, stage: str, key: str, value) -> None:
+        path = self._path(stage, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename so an interrupted run never leaves a partial file
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(value, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.saved += 1
+
+
+def get_checkpoint_store(root: str = DEFAULT_CHECKPOINT_DIR) -> Optional[CheckpointStore]:
+    """Returns a store rooted at `root`, or None when disabled with MOM_CHECKPOINTS=0."""
+    if os.getenv("MOM_CHECKPOINTS", "1") == "0":
+        return None
+    return CheckpointStore(root)
@@ -0,0 +1,156 @@
+# chunking.py
+import re
+from typing import List, Tuple
+
+# A segment starts with a timestamp at the beginning of a line
+SEGMENT_START = re.compile(r"^\d{1,2}:\d{2}", flags=re.M)
+
+_CHARS_PER_TOKEN = 4
+
+# Characters that usually become a token of their own
+_PUNCTUATION = ",.?!;:'\"()-"
+
+
+# -----------------------------
+# TOKEN ESTIMATE (offline)
+# -----------------------------
+
+def estimate_tokens(text: str, start: int = 0, end: int = None) -> int:
+    """
+    Local, dependency-free estimate of the model token count of
+    text[start:end], computed with str.count over the range (no slicing).
+    Takes the larger of words + punctuation marks and chars / 4, which
+    errs on the high side for English transcripts.
+    """
+    if end is None:
+        end = len(text)
+    if end <= start:
+        return 0
+    words = text.count(" ", start, end) + text.count("\n", start, end) + 1
+    marks = sum(text.count(ch, start, end) for ch in _PUNCTUATION)
+    return max(words + marks, -(-(end - start) // _CHARS_PER_TOKEN))
+
+
+# -----------------------------
+# SEGMENTS
+# -----------------------------
+
+def segment_spans(text: str) -> List[Tuple[int, int]]:
+    """
+    (start, end) offsets of the timestamp segments of `text`. Any text
+    before the first timestamp forms its own leading segment.
+    """
+    starts = [m.start() for m in SEGMENT_START.finditer(text)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    ends = starts[1:] + [len(text)]
+    return list(zip(starts, ends))
+
+
+def _split_oversized(text: str, start: int, end: int, max_tokens: int) -> List[Tuple[int, int]]:
+    """Cut a single segment that exceeds the budget at newlines, sentence ends or spaces."""
+    spans = []
+    budget_chars = max(1, max_tokens * 3)
+    while estimate_tokens(text, start, end) > max_tokens:
+        limit = min(end, start + budget_chars)
+        cut = -1
+        for sep in ("\n", ". ", "? ", "! ", " "):
+            idx = text.rfind(sep, start + 1, limit)
+            if idx != -1:
+                cut = idx + len(sep)
+                break
+        if cut <= start:
+            cut = limit
+        spans.append((start, cut))
+        start = cut
+    if start < end:
+        spans.append((start, end))
+    return spans
+
+
+# -----------------------------
+# CHUNKER
+# -----------------------------
+
+def pack_segments(costs: List[int], max_tokens: int, overlap: int = 0) -> List[Tuple[int, int, int]]:
+    """
+    Greedily packs consecutive segments of the given token costs into
+    chunks within `max_tokens` (a single larger segment gets a chunk of
+    its own). Every chunk after the first repeats the last `overlap`
+    segments of the previous one, as long as they leave room.
+    Returns (context, first, end) segment indices per chunk: segments
+    [context:first] are the repeated context, [first:end] the new ones.
+    """
+    chunks = []
+    i = 0
+    n = len(costs)
+    while i < n:
+        # Context: up to `overlap` previous segments, as long as they leave room
+        ctx = min(overlap, i) if chunks else 0
+        while ctx and sum(costs[i - ctx:i]) + costs[i] > max_tokens:
+            ctx -= 1
+        used = sum(costs[i - ctx:i])
+
+        j = i
+        while j < n and (j == i or used + costs[j] <= max_tokens):
+            used += costs[j]
+            j += 1
+
+        chunks.append((i - ctx, i, j))
+        i = j
+
+    return chunks
+
+
+def chunk_spans(text: str, max_tokens: int, overlap: int = 0) -> List[Tuple[int, int, int]]:
+    """
+    Greedily packs whole timestamp segments into chunks whose estimated
+    token count stays within `max_tokens`, walking offsets only (the text
+    is never re-sliced while packing).
+    Returns (start, body_start, end) per chunk: text[start:end] is the
+    chunk, and text[start:body_start] repeats the last `overlap` segments
+    of the previous chunk as context.
+    """
+    segments = []
+    for start, end in segment_spans(text):
+        segments.extend(_split_oversized(text, start, end, max_tokens))
+    costs = [estimate_tokens(text, start, end) for start, end in segments]
+    return [
+        (segments[ctx][0], segments[first][0], segments[end - 1][1])
+        for ctx, first, end in pack_segments(costs, max_tokens, overlap)
+    ]
+
+
+def chunk_by_tokens(text: str, max_tokens: int, overlap: int = 0) -> List[str]:
+    """Chunk texts for chunk_spans(), without trailing whitespace."""
+    chunks = []
+    for start, _, end in chunk_spans(text, max_tokens, overlap):
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if end > start:
+            chunks.append(text[start:end])
+    return chunks
+
+
+def pack_by_tokens(items: list, max_tokens: int, cost, max_items: int = None) -> List[list]:
+    """
+    Greedy packing of a sequence (e.g. sentences) into consecutive
+    batches whose summed cost(item) stays within `max_tokens`, and at most
+    `max_items` items each. An item that alone exceeds the budget gets a
+    batch of its own.
+    """
+    batches = []
+    current = []
+    used = 0
+    for item in items:
+        c = cost(item)
+        full = max_items is not None and len(current) >= max_items
+        if current and (used + c > max_tokens or full):
+            batches.append(current)
+            current = []
+            used = 0
+        current.append(item)
+        used += c
+    if current:
+        batches.append(current)
+    return batches
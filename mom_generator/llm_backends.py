@@ -0,0 +1,252 @@
+# llm_backends.py
+import hashlib
+import json
+import os
+import random
+import re
+import time
+from collections import namedtuple
+
+from mom_generator.chunking import estimate_tokens
+
+# What a backend returns for one chat completion
+Completion = namedtuple("Completion", "content prompt_tokens completion_tokens")
+
+
+# -----------------------------
+# OPENAI
+# -----------------------------
+
+class OpenAIBackend:
+    """Chat completions from the OpenAI API (the default backend)."""
+
+    name = "openai"
+
+    def __init__(self, client=None):
+        # None: the shared client from llm_client.get_client(), built on first use
+        self.client = client
+
+    def complete(self, model: str, messages: list, task: str = None, **params) -> Completion:
+        client = self.client
+        if client is None:
+            from mom_generator.llm_client import get_client
+
+            client = get_client()
+        response = client.chat.completions.create(model=model, messages=messages, **params)
+        content = response.choices[0].message.content or ""
+        usage = getattr(response, "usage", None)
+        return Completion(
+            content,
+            getattr(usage, "prompt_tokens", None),
+            getattr(usage, "completion_tokens", None),
+        )
+
+    def stream(self, model: str, messages: list, task: str = None, usage: dict = None, **params):
+        """
+        Yields the reply text in chunks as the API sends them. The token
+        counts of the final chunk go into `usage`. Closing the generator
+        closes the connection, which stops the generation.
+        """
+        client = self.client
+        if client is None:
+            from mom_generator.llm_client import get_client
+
+            client = get_client()
+        response = client.chat.completions.create(
+            model=model, messages=messages, stream=True,
+            stream_options={"include_usage": True}, **params
+        )
+        try:
+            for chunk in response:
+                if chunk.choices:
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        yield delta
+                if getattr(chunk, "usage", None) is not None and usage is not None:
+                    usage["prompt_tokens"] = chunk.usage.prompt_tokens
+                    usage["completion_tokens"] = chunk.usage.completion_tokens
+        finally:
+            close = getattr(response, "close", None)
+            if close is not None:
+                close()
+
+
+# -----------------------------
+# FAKE (offline)
+# -----------------------------
+
+class FakeBackendError(Exception):
+    """Injected failure; carries a status code like the OpenAI errors do."""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"fake backend error {status_code}")
+        self.status_code = status_code
+
+
+# Characters per streamed chunk (a few tokens, like the API sends)
+STREAM_CHUNK_CHARS = 12
+
+_NUMBERED_LINE = re.compile(r"^\[(\d+)\]\s+(\d{1,2}:\d{2})\s+(.*)$", re.M)
+_PLAIN_LINE = re.compile(r"^(\d{1,2}:\d{2})\s+(.*)$", re.M)
+_LABELED_LINE = re.compile(r"^\d{1,2}:\d{2}\s+(Speaker \d|Unknown):\s*(.*)$", re.M)
+_TASK_WORDS = re.compile(r"\b(will|should|need to|please|send|share|prepare|update|review|finalize)\b", re.I)
+_DECISION_WORDS = re.compile(r"\b(agree|agreed|decide|decided|let's|plan|go with|finalize)\b", re.I)
+
+
+def _transcript(prompt: str) -> str:
+    """
+    The text after the prompt's "Transcript:" (or "Partial summaries:")
+    heading, without the closing "Return ..." instructions.
+    """
+    for heading in ("Transcript:\n", "Partial summaries:\n"):
+        start = prompt.find(heading)
+        if start != -1:
+            body = prompt[start + len(heading):]
+            end = body.rfind("\n\nReturn")
+            return (body[:end] if end != -1 else body).strip()
+    return prompt.strip()
+
+
+def _fake_labels(sentences):
+    """Alternates speakers after questions and keeps them otherwise."""
+    label = 1
+    labels = []
+    for i, sentence in enumerate(sentences):
+        if i and sentences[i - 1].rstrip().endswith("?"):
+            label = 3 - label
+        labels.append(label)
+    return labels
+
+
+def _fake_reply(task: str, prompt: str, rng: random.Random) -> str:
+    """A response in the format the given task expects, built from the prompt's transcript."""
+    text = _transcript(prompt)
+
+    if task == "grammar":
+        return text
+
+    if task == "speakers_compact":
+        lines = _NUMBERED_LINE.findall(text)
+        labels = _fake_labels([sentence for _, _, sentence in lines])
+        return "\n".join(f"{n}: {label}" for (n, _, _), label in zip(lines, labels))
+
+    if task == "speakers":
+        lines = _PLAIN_LINE.findall(text)
+        labels = _fake_labels([sentence for _, sentence in lines])
+        return "\n".join(
+            f"{ts} Speaker {label}: {sentence}" for (ts, sentence), label in zip(lines, labels)
+        )
+
+    labeled = _LABELED_LINE.findall(text) or [("Speaker 1", line) for line in text.splitlines()]
+    tasks = [(s, t) for s, t in labeled if _TASK_WORDS.search(t)][:5]
+    decisions = [t for _, t in labeled if _DECISION_WORDS.search(t)][:3]
+    questions = [(s, t) for s, t in labeled if t.rstrip().endswith("?")][:5]
+    sentences = [t for _, t in labeled if len(t.split()) > 4]
+    summary = " ".join(rng.sample(sentences, min(4, len(sentences)))) or "The meeting was brief."
+
+    if task == "action_items":
+        return "\n".join(f"- [{s}] {t}" for s, t in tasks)
+    if task == "decisions":
+        return "\n".join(f"- {t}" for t in decisions)
+    if task == "questions":
+        return "\n".join(f"- [{s}] {t}" for s, t in questions)
+    if task == "mom_sections":
+        return json.dumps({
+            "summary": summary,
+            "action_items": [{"speaker": s, "task": t} for s, t in tasks],
+            "decisions": decisions,
+            "questions": [{"speaker": s, "question": t} for s, t in questions],
+        })
+    # "summary", "summary_reduce" and anything untagged
+    return summary
+
+
+class FakeBackend:
+    """
+    Offline stand-in for the OpenAI API, for load tests and benchmarks on
+    a machine without network access. Replies are valid for the calling
+    stage's `task` tag: corrected text, labeled or compact speaker lines,
+    bullet lists, a JSON MoM document or a summary.
+    Each call waits latency ± jitter, plus the reply tokens at
+    `tokens_per_second`, and fails with a retryable 429 / 500 error at
+    `error_rate`. Replies are deterministic for a given prompt, and
+    stream() delivers them in small chunks like the API does.
+    (Pacing still goes through the scheduler; raise MOM_LLM_LIMITS for
+    unthrottled load tests.)
+    """
+
+    name = "fake"
+
+    def __init__(self, latency: float = 0.5, jitter: float = 0.2, error_rate: float = 0.0,
+                 tokens_per_second: float = 50.0, sleep=time.sleep):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.tokens_per_second = tokens_per_second
+        self.sleep = sleep
+        self._rng = random.Random()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            latency=float(os.getenv("MOM_FAKE_LATENCY", "0.5")),
+            jitter=float(os.getenv("MOM_FAKE_JITTER", "0.2")),
+            error_rate=float(os.getenv("MOM_FAKE_ERROR_RATE", "0")),
+            tokens_per_second=float(os.getenv("MOM_FAKE_TOKENS_PER_SECOND", "50")),
+        )
+
+    def _reply(self, messages, task, params):
+        """(Completion, delay before the first token); raises the injected errors."""
+        prompt = "\n".join(m.get("content") or "" for m in messages)
+        delay = max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+
+        if self.error_rate and self._rng.random() < self.error_rate:
+            self.sleep(delay)
+            raise FakeBackendError(self._rng.choice((429, 500)))
+
+        seed = hashlib.sha256(prompt.encode("utf-8")).digest()
+        content = _fake_reply(task, prompt, random.Random(seed))
+        completion_tokens = estimate_tokens(content)
+        max_tokens = params.get("max_tokens")
+        if max_tokens and completion_tokens > max_tokens:
+            # Cut off like a real reply that hits the limit
+            content = content[:max_tokens * 4]
+            content = content[:content.rfind("\n")] if "\n" in content else content
+            completion_tokens = max_tokens
+        return Completion(content, estimate_tokens(prompt), completion_tokens), delay
+
+    def complete(self, model: str, messages: list, task: str = None, **params) -> Completion:
+        completion, delay = self._reply(messages, task, params)
+        if self.tokens_per_second:
+            delay += completion.completion_tokens / self.tokens_per_second
+        self.sleep(delay)
+        return completion
+
+    def stream(self, model: str, messages: list, task: str = None, usage: dict = None, **params):
+        """complete(), delivered a few tokens at a time at `tokens_per_second`."""
+        completion, delay = self._reply(messages, task, params)
+        self.sleep(delay)
+        content = completion.content
+        for start in range(0, len(content), STREAM_CHUNK_CHARS):
+            chunk = content[start:start + STREAM_CHUNK_CHARS]
+            if self.tokens_per_second:
+                self.sleep(estimate_tokens(chunk) / self.tokens_per_second)
+            yield chunk
+        if usage is not None:
+            usage["prompt_tokens"] = completion.prompt_tokens
+            usage["completion_tokens"] = completion.completion_tokens
+
+
+# -----------------------------
+# SELECTION
+# -----------------------------
+
+BACKENDS = {"openai": OpenAIBackend, "fake": FakeBackend.from_env}
+
+
+def backend_from_env():
+    """The backend named by MOM_LLM_BACKEND ("openai" by default, or "fake")."""
+    name = os.getenv("MOM_LLM_BACKEND", "openai")
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown MOM_LLM_BACKEND '{name}' (expected one of {', '.join(BACKENDS)})")
+    return BACKENDS[name]()
@@ -0,0 +1,180 @@
+# llm_cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+DEFAULT_CACHE_PATH = os.getenv("MOM_LLM_CACHE_PATH", "data/.cache/llm_cache.sqlite")
+DEFAULT_MAX_BYTES = int(os.getenv("MOM_LLM_CACHE_MAX_MB", "256")) * 1024 * 1024
+
+
+# -----------------------------
+# CACHE KEY
+# -----------------------------
+
+def make_cache_key(model: str, messages: list, **params) -> str:
+    """
+    Content-addressed key: sha256 over the model, the full prompt
+    messages and every sampling parameter (temperature, max_tokens, ...).
+    """
+    payload = json.dumps(
+        {"model": model, "messages": messages, "params": params},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# -----------------------------
+# SQLITE-BACKED LRU CACHE
+# -----------------------------
+
+class LLMCache:
+    """
+    On-disk cache of chat completion responses.
+    Entries are evicted least-recently-used first once the stored
+    responses exceed `max_bytes`; a running total of their size (summed
+    once when the cache is opened) tells when, so a write does not scan
+    the table. Hit/miss counters are kept both for this process and
+    cumulatively in the database.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_last_access ON responses(last_access)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+            )
+        self.total_bytes = self._stored_bytes()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT response FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                self._bump("misses")
+                return None
+            self._conn.execute(
+                "UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            self.hits += 1
+            self._bump("hits")
+            return row[0]
+
+    def put(self, key: str, model: str, response: str) -> None:
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock, self._conn:
+            replaced = self._conn.execute(
+                "SELECT size FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, size, now, now),
+            )
+            self.total_bytes += size - (replaced[0] if replaced else 0)
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+
+    def _stored_bytes(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def _evict(self) -> None:
+        # Other processes may share the database: start from the real total
+        total = self._stored_bytes()
+        if total <= self.max_bytes:
+            self.total_bytes = total
+            return
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY last_access ASC"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+        self.total_bytes = total
+
+    def _bump(self, name: str) -> None:
+        self._conn.execute(
+            "INSERT INTO stats VALUES (?, 1) ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (name,),
+        )
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+            cumulative = dict(self._conn.execute("SELECT name, value FROM stats").fetchall())
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "total_hits": cumulative.get("hits", 0),
+            "total_misses": cumulative.get("misses", 0),
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+        }
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.execute("DELETE FROM stats")
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+
+# -----------------------------
+# SHARED INSTANCE
+# -----------------------------
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> Optional[LLMCache]:
+    """
+    Returns the process-wide cache, or None when disabled with
+    MOM_LLM_CACHE=0.
+    """
+    global _cache
+    if os.getenv("MOM_LLM_CACHE", "1") == "0":
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache()
+        return _cache
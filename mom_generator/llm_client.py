@@ -0,0 +1,229 @@
+# llm_client.py
+import os
+import threading
+import time
+from typing import Iterable, Iterator
+
+from mom_generator.chunking import estimate_tokens
+from mom_generator.llm_backends import OpenAIBackend, backend_from_env
+from mom_generator.llm_cache import get_cache, make_cache_key
+from mom_generator.llm_scheduler import get_scheduler
+from mom_generator.metrics import get_metrics
+
+# Set to 0 to wait for complete replies instead of streaming them
+STREAMING = os.getenv("MOM_LLM_STREAM", "1") != "0"
+
+_client = None
+_backend = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    The OpenAI client shared by every stage, built on first use: the
+    openai package is only imported (and the API key only read) once a
+    request actually has to go over the network.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from openai import OpenAI
+
+                # Retries are left to the scheduler
+                _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+    return _client
+
+
+def get_backend():
+    """The backend every call goes to, chosen by MOM_LLM_BACKEND on first use."""
+    global _backend
+    if _backend is None:
+        with _client_lock:
+            if _backend is None:
+                _backend = backend_from_env()
+    return _backend
+
+
+def set_backend(backend) -> None:
+    """Routes all further calls to `backend` (e.g. a FakeBackend in benchmarks)."""
+    global _backend
+    _backend = backend
+
+
+def chat_completion(model: str, messages: list, client=None, task: str = None, **params) -> str:
+    """
+    Single entry point for every chat completion in the pipeline.
+    Returns the response message content. Identical requests (same model,
+    messages and sampling parameters) are served from the on-disk cache,
+    so re-running unchanged input makes no network calls.
+    Calls go to the configured backend (llm_backends.py), or to the given
+    OpenAI `client`. `task` names the calling stage ("grammar",
+    "speakers", ...); it is not part of the request or the cache key.
+    Network calls go through the rate-limit scheduler (llm_scheduler.py),
+    which paces them and retries transient errors. Each call is recorded
+    in the running pipeline's metrics, if any.
+    """
+    metrics = get_metrics()
+    start = time.perf_counter()
+    backend = OpenAIBackend(client) if client is not None else get_backend()
+    cache = get_cache()
+    # Responses of other backends (e.g. the fake) never mix with real ones
+    cache_model = model if backend.name == "openai" else f"{backend.name}/{model}"
+    key = make_cache_key(cache_model, messages, **params)
+
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            if metrics is not None:
+                metrics.record_call(task, model, time.perf_counter() - start, cache_hit=True)
+            return cached
+
+    # Budgeted as prompt + reply; without max_tokens the reply is assumed
+    # to be about as long as the prompt
+    prompt_tokens = sum(estimate_tokens(m.get("content") or "") for m in messages)
+    estimated = prompt_tokens + params.get("max_tokens", prompt_tokens)
+
+    scheduler = get_scheduler()
+    stats = {}
+    try:
+        completion = scheduler.call(
+            model,
+            estimated,
+            lambda: backend.complete(model, messages, task=task, **params),
+            stats=stats,
+        )
+    except Exception as e:
+        if metrics is not None:
+            metrics.record_call(
+                task, model, time.perf_counter() - start,
+                queue_wait=stats.get("queue_wait", 0.0),
+                retries=stats.get("retries", 0),
+                error=type(e).__name__,
+            )
+        raise
+    if completion.prompt_tokens is not None and completion.completion_tokens is not None:
+        scheduler.settle(model, estimated, completion.prompt_tokens + completion.completion_tokens)
+    content = completion.content
+
+    if metrics is not None:
+        metrics.record_call(
+            task, model, time.perf_counter() - start,
+            queue_wait=stats["queue_wait"],
+            retries=stats["retries"],
+            prompt_tokens=completion.prompt_tokens,
+            completion_tokens=completion.completion_tokens,
+        )
+
+    if cache is not None:
+        cache.put(key, cache_model, content)
+
+    return content
+
+
+# -----------------------------
+# STREAMING
+# -----------------------------
+
+def iter_lines(chunks: Iterable[str]) -> Iterator[str]:
+    """
+    Incremental line parser: yields each line of a stream of text chunks
+    (without its newline) as soon as the line is complete, and the last
+    line when the stream ends.
+    """
+    pending = ""
+    for chunk in chunks:
+        pending += chunk
+        if "\n" in chunk:
+            *lines, pending = pending.split("\n")
+            yield from lines
+    if pending:
+        yield pending
+
+
+def stream_completion(model: str, messages: list, client=None, task: str = None,
+                      **params) -> Iterator[str]:
+    """
+    chat_completion() with a streamed reply: yields the reply line by line
+    while the model is still writing, so the caller can start on the
+    first lines right away. Cached replies are replayed line by line.
+    Only opening the stream goes through the scheduler's retries; an error
+    after lines were handed out is raised to the caller, and a reply cut
+    short by an error is never cached. A caller that closes the generator
+    early (it has all it needs) waits while the rest of the reply is read,
+    so the whole reply is cached and a re-run makes no call.
+    With MOM_LLM_STREAM=0 the complete reply is fetched with
+    chat_completion() and then split into lines.
+    """
+    if not STREAMING:
+        yield from iter_lines([chat_completion(model, messages, client=client, task=task, **params)])
+        return
+
+    metrics = get_metrics()
+    start = time.perf_counter()
+    backend = OpenAIBackend(client) if client is not None else get_backend()
+    cache = get_cache()
+    cache_model = model if backend.name == "openai" else f"{backend.name}/{model}"
+    key = make_cache_key(cache_model, messages, **params)
+
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            if metrics is not None:
+                metrics.record_call(task, model, time.perf_counter() - start, cache_hit=True)
+            yield from iter_lines([cached])
+            return
+
+    prompt_tokens = sum(estimate_tokens(m.get("content") or "") for m in messages)
+    estimated = prompt_tokens + params.get("max_tokens", prompt_tokens)
+
+    scheduler = get_scheduler()
+    stats = {}
+    usage = {}
+    parts = []
+
+    def request():
+        # The first chunk is read here, so failures to connect are retried
+        chunks = iter(backend.stream(model, messages, task=task, usage=usage, **params))
+        return chunks, next(chunks, "")
+
+    def received(chunks, first):
+        parts.append(first)
+        yield first
+        for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+
+    error = None
+    complete = False
+    first_output = None
+    try:
+        chunks, first = scheduler.call(model, estimated, request, stats=stats)
+        first_output = time.perf_counter() - start
+        yield from iter_lines(received(chunks, first))
+        complete = True
+    except GeneratorExit:
+        try:
+            parts.extend(chunks)
+            complete = True
+        except Exception as e:
+            error = type(e).__name__
+        raise
+    except Exception as e:
+        error = type(e).__name__
+        raise
+    finally:
+        if usage.get("prompt_tokens") is not None and usage.get("completion_tokens") is not None:
+            scheduler.settle(model, estimated, usage["prompt_tokens"] + usage["completion_tokens"])
+        if metrics is not None:
+            metrics.record_call(
+                task, model, time.perf_counter() - start,
+                queue_wait=stats.get("queue_wait", 0.0),
+                retries=stats.get("retries", 0),
+                prompt_tokens=usage.get("prompt_tokens"),
+                completion_tokens=usage.get("completion_tokens"),
+                error=error,
+                first_output=first_output,
+            )
+        if complete and cache is not None:
+            cache.put(key, cache_model, "".join(parts))
@@ -0,0 +1,129 @@
+# llm_routing.py
+import contextlib
+import json
+import os
+import threading
+from typing import Callable, Iterator, List, Optional
+
+from mom_generator.llm_client import chat_completion, stream_completion
+
+# Cheap, fast model tried first for every routed task
+FAST_MODEL = os.getenv("MOM_FAST_MODEL", "gpt-4o-mini")
+
+# Set to 0 to send every task straight to the model its caller names
+ROUTING_ENABLED = os.getenv("MOM_LLM_ROUTING", "1") != "0"
+
+
+def _env_routes():
+    raw = os.getenv("MOM_LLM_ROUTES")
+    return json.loads(raw) if raw else {}
+
+
+def route_for(task: str, model: str) -> List[str]:
+    """
+    Models to try for `task`, in order. MOM_LLM_ROUTES sets them per task
+    ('{"speakers_compact": ["gpt-4o-mini", "gpt-4"]}'); otherwise the fast
+    model is tried first and the caller's model is the escalation tier.
+    """
+    if not ROUTING_ENABLED:
+        return [model]
+    routes = _env_routes()
+    if task in routes:
+        return list(routes[task])
+    return [FAST_MODEL] if model == FAST_MODEL else [FAST_MODEL, model]
+
+
+# -----------------------------
+# ESCALATION STATS
+# -----------------------------
+
+class RoutingStats:
+    """Per task: routed calls, escalations, and calls still invalid on the last tier."""
+
+    def __init__(self):
+        self.tasks = {}
+        self._lock = threading.Lock()
+
+    def record(self, task, tiers_used, valid):
+        with self._lock:
+            stats = self.tasks.setdefault(task, {"calls": 0, "escalated": 0, "invalid": 0})
+            stats["calls"] += 1
+            stats["escalated"] += tiers_used > 1
+            stats["invalid"] += not valid
+
+    def report(self) -> str:
+        lines = []
+        for task, s in sorted(self.tasks.items()):
+            rate = s["escalated"] / s["calls"] if s["calls"] else 0.0
+            lines.append(
+                f"  {task:<18} {s['calls']:>4} calls, {s['escalated']:>3} escalated "
+                f"({rate:.0%}), {s['invalid']} invalid after the last tier"
+            )
+        return "Model routing:\n" + "\n".join(lines) if lines else "Model routing: no routed calls"
+
+
+_stats = RoutingStats()
+
+
+def get_routing_stats() -> RoutingStats:
+    return _stats
+
+
+# -----------------------------
+# ROUTED COMPLETION
+# -----------------------------
+
+def routed_completion(model: str, messages: list, task: str,
+                      validate: Callable[[str], List[str]], **params) -> str:
+    """
+    chat_completion() over the route for `task`: each tier's reply is
+    checked with `validate` (returns a list of problems, empty when the
+    reply is usable) and the next, larger model is tried only when it
+    fails. The last tier's reply is returned even if it is invalid, so
+    the caller's own fallbacks still apply.
+    """
+    tiers = route_for(task, model)
+    content = ""
+    problems = []
+    for used, tier_model in enumerate(tiers, start=1):
+        content = chat_completion(model=tier_model, messages=messages, task=task, **params)
+        problems = validate(content)
+        if not problems:
+            break
+        if used < len(tiers):
+            print(f"Routing: {task} reply from {tier_model} rejected ({problems[0]}); escalating.")
+    _stats.record(task, used, not problems)
+    return content
+
+
+def routed_stream(model: str, messages: list, task: str,
+                  validate: Callable[[str], List[str]], **params) -> Iterator[Optional[str]]:
+    """
+    routed_completion() with streamed replies: yields each line as it
+    arrives. When a tier's complete reply fails `validate` and a larger
+    model follows, None is yielded before that model's lines: everything
+    received before it is superseded. A caller that stops reading early
+    (it has all it needs) counts as a valid reply.
+    """
+    tiers = route_for(task, model)
+    problems = []
+    used = 0
+    try:
+        for used, tier_model in enumerate(tiers, start=1):
+            lines = []
+            # Closed right away when the caller stops early, so the reply
+            # is read to its end and cached before this returns
+            with contextlib.closing(
+                stream_completion(model=tier_model, messages=messages, task=task, **params)
+            ) as reply:
+                for line in reply:
+                    lines.append(line)
+                    yield line
+            problems = validate("\n".join(lines))
+            if not problems:
+                break
+            if used < len(tiers):
+                print(f"Routing: {task} reply from {tier_model} rejected ({problems[0]}); escalating.")
+                yield None
+    finally:
+        _stats.record(task, used, not problems)
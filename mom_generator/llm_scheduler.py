@@ -0,0 +1,230 @@
+# llm_scheduler.py
+import heapq
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+# Priorities: lower goes first
+INTERACTIVE = 0
+BATCH = 1
+
+# (requests per minute, tokens per minute) per model. Override with
+# MOM_LLM_LIMITS='{"gpt-4": [500, 30000]}'.
+DEFAULT_LIMITS = {
+    "gpt-4": (500, 10_000),
+    "gpt-4o-mini": (500, 200_000),
+}
+FALLBACK_LIMITS = (500, 30_000)
+
+MAX_RETRIES = int(os.getenv("MOM_LLM_MAX_RETRIES", "5"))
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 60.0
+
+# Part of every budget that batch jobs may use together; the rest stays
+# free for interactive runs
+BATCH_SHARE = float(os.getenv("MOM_LLM_BATCH_SHARE", "0.8"))
+
+
+# -----------------------------
+# TOKEN BUCKET
+# -----------------------------
+
+class TokenBucket:
+    """Holds up to `per_minute` units and refills at per_minute / 60 per second."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` units are available (0 if they are now)."""
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+        # A request larger than the bucket waits for a full bucket
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        # May go negative: an oversized request or a correction delays the next one
+        self.level -= amount
+
+
+# -----------------------------
+# ERRORS
+# -----------------------------
+
+def is_retryable(error: Exception) -> bool:
+    """Rate limits, timeouts, connection drops and server errors are worth retrying."""
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in (408, 409, 429) or status >= 500
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError", "TimeoutError")
+
+
+def _retry_after(error: Exception) -> float:
+    """Seconds asked for by a Retry-After header, or 0."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after", 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+# -----------------------------
+# SCHEDULER
+# -----------------------------
+
+class RateLimitScheduler:
+    """
+    Paces every LLM call of the process against per-model requests-per-
+    minute and tokens-per-minute budgets (scaled by `share`), and retries
+    failed calls with jittered exponential backoff.
+    Callers waiting on the same model are served by priority, then in
+    arrival order, so interactive calls go ahead of queued batch calls.
+    A rate-limit error pauses the model for every caller, not just the
+    one that hit it.
+    """
+
+    def __init__(self, limits: dict = None, share: float = 1.0, priority: int = INTERACTIVE,
+                 max_retries: int = MAX_RETRIES, sleep: Callable[[float], None] = time.sleep):
+        self.limits = dict(DEFAULT_LIMITS, **(limits or {}))
+        self.share = share
+        self.priority = priority
+        self.max_retries = max_retries
+        self.sleep = sleep
+        self.calls = 0
+        self.retries = 0
+        self.waited = 0.0
+
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._buckets = {}
+        self._waiting = {}
+        self._paused_until = {}
+
+    def _buckets_for(self, model):
+        if model not in self._buckets:
+            rpm, tpm = self.limits.get(model, FALLBACK_LIMITS)
+            self._buckets[model] = (
+                TokenBucket(max(1.0, rpm * self.share)),
+                TokenBucket(max(1.0, tpm * self.share)),
+            )
+        return self._buckets[model]
+
+    def acquire(self, model: str, tokens: int, priority: Optional[int] = None) -> float:
+        """
+        Blocks until one request of about `tokens` tokens may be sent.
+        Returns the seconds spent waiting.
+        """
+        priority = self.priority if priority is None else priority
+        ticket = (priority, next(self._seq))
+        start = time.monotonic()
+        with self._cond:
+            queue = self._waiting.setdefault(model, [])
+            heapq.heappush(queue, ticket)
+            try:
+                while True:
+                    wait = None
+                    if queue[0] == ticket:
+                        now = time.monotonic()
+                        requests, token_bucket = self._buckets_for(model)
+                        wait = max(
+                            requests.wait_time(1, now),
+                            token_bucket.wait_time(tokens, now),
+                            self._paused_until.get(model, 0.0) - now,
+                        )
+                        if wait <= 0:
+                            requests.take(1)
+                            token_bucket.take(tokens)
+                            self.calls += 1
+                            self.waited += now - start
+                            return now - start
+                    self._cond.wait(wait)
+            finally:
+                queue.remove(ticket)
+                heapq.heapify(queue)
+                self._cond.notify_all()
+
+    def settle(self, model: str, estimated: int, actual: int) -> None:
+        """Corrects the token budget once the real usage of a call is known."""
+        with self._cond:
+            _, token_bucket = self._buckets_for(model)
+            token_bucket.take(actual - estimated)
+
+    def _pause(self, model, seconds):
+        with self._cond:
+            until = time.monotonic() + seconds
+            self._paused_until[model] = max(self._paused_until.get(model, 0.0), until)
+
+    def backoff(self, attempt: int, error: Exception = None) -> float:
+        """Exponential delay for retry `attempt` (0-based), half of it random."""
+        delay = min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt)
+        delay = delay / 2 + random.uniform(0, delay / 2)
+        return max(delay, _retry_after(error)) if error is not None else delay
+
+    def call(self, model: str, tokens: int, request: Callable, priority: Optional[int] = None,
+             stats: dict = None):
+        """
+        Runs request() once the budgets allow it, retrying retryable errors
+        up to max_retries times. The last error is re-raised.
+        A `stats` dict gets the total "queue_wait" seconds and "retries".
+        """
+        stats = {} if stats is None else stats
+        stats.setdefault("queue_wait", 0.0)
+        stats.setdefault("retries", 0)
+        for attempt in range(self.max_retries + 1):
+            stats["queue_wait"] += self.acquire(model, tokens, priority)
+            try:
+                return request()
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                delay = self.backoff(attempt, e)
+                if getattr(e, "status_code", None) == 429:
+                    self._pause(model, delay)
+                with self._cond:
+                    self.retries += 1
+                stats["retries"] += 1
+                print(
+                    f"LLM call to {model} failed ({type(e).__name__}); "
+                    f"retry {attempt + 1}/{self.max_retries} in {delay:.1f}s"
+                )
+                self.sleep(delay)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def _env_limits():
+    raw = os.getenv("MOM_LLM_LIMITS")
+    if not raw:
+        return {}
+    return {model: tuple(limits) for model, limits in json.loads(raw).items()}
+
+
+def configure_scheduler(priority: int = INTERACTIVE, share: float = 1.0, limits: dict = None,
+                        **kwargs) -> RateLimitScheduler:
+    """Replaces the process-wide scheduler (e.g. in a batch worker)."""
+    global _scheduler
+    limits = dict(_env_limits(), **(limits or {}))
+    with _scheduler_lock:
+        _scheduler = RateLimitScheduler(limits, share=share, priority=priority, **kwargs)
+    return _scheduler
+
+
+def get_scheduler() -> RateLimitScheduler:
+    """The process-wide scheduler, created on first use."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = RateLimitScheduler(_env_limits())
+    return _scheduler
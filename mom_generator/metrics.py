@@ -0,0 +1,220 @@
+# metrics.py
+import contextlib
+import io
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+# USD per 1M (prompt, completion) tokens. Override with
+# MOM_LLM_PRICES='{"gpt-4": [30, 60]}'.
+DEFAULT_PRICES = {
+    "gpt-4": (30.0, 60.0),
+    "gpt-4o-mini": (0.15, 0.60),
+}
+
+# Opt-in profiling of every stage: cProfile (.prof file per stage, main
+# thread only) and tracemalloc (peak traced memory per stage)
+PROFILE_STAGES = os.getenv("MOM_PROFILE", "0") == "1"
+TRACE_MEMORY = os.getenv("MOM_TRACEMALLOC", "0") == "1"
+
+# "jsonl" (metrics.jsonl) or "prometheus" (metrics.prom) in the output dir
+METRICS_FORMAT = os.getenv("MOM_METRICS_FORMAT", "jsonl")
+
+_STAGE_TOTALS = (
+    "calls", "cache_hits", "retries", "errors", "prompt_tokens", "completion_tokens", "cost_usd",
+)
+
+
+def _prices():
+    raw = os.getenv("MOM_LLM_PRICES")
+    prices = dict(DEFAULT_PRICES)
+    if raw:
+        prices.update({model: tuple(p) for model, p in json.loads(raw).items()})
+    return prices
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> Optional[float]:
+    """USD cost of one call, or None for a model without a known price."""
+    price = _prices().get(model)
+    if price is None:
+        return None
+    return (prompt_tokens * price[0] + completion_tokens * price[1]) / 1_000_000
+
+
+# -----------------------------
+# RECORDER
+# -----------------------------
+
+class MetricsRecorder:
+    """
+    Collects one record per LLM call and one per pipeline stage.
+    Calls are attributed to the stage that is running when they finish
+    (stages run one after another; their calls may come from worker
+    threads).
+    """
+
+    def __init__(self, profile_dir: str = None, profile: bool = PROFILE_STAGES,
+                 trace_memory: bool = TRACE_MEMORY):
+        self.calls = []
+        self.stages = []
+        self.current_stage = None
+        self.profile_dir = profile_dir
+        self.profile = profile
+        self.trace_memory = trace_memory
+        self._lock = threading.Lock()
+
+    def record_call(self, task, model, seconds, cache_hit=False, queue_wait=0.0, retries=0,
+                    prompt_tokens=0, completion_tokens=0, error=None, first_output=None):
+        cost = estimate_cost(model, prompt_tokens or 0, completion_tokens or 0)
+        record = {
+            "type": "call",
+            "stage": self.current_stage,
+            "task": task,
+            "model": model,
+            "seconds": round(seconds, 4),
+            # Streamed calls: seconds until the first reply text arrived
+            "first_output": round(first_output, 4) if first_output is not None else None,
+            "queue_wait": round(queue_wait, 4),
+            "prompt_tokens": prompt_tokens or 0,
+            "completion_tokens": completion_tokens or 0,
+            "cost_usd": round(cost, 6) if cost is not None else None,
+            "retries": retries,
+            "cache_hit": cache_hit,
+            "error": error,
+        }
+        with self._lock:
+            self.calls.append(record)
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        """Times a pipeline stage, with the opt-in profilers around it."""
+        # The profilers are only imported when asked for
+        if self.profile:
+            import cProfile
+        if self.trace_memory:
+            import tracemalloc
+
+        self.current_stage = name
+        first_call = len(self.calls)
+        profiler = cProfile.Profile() if self.profile else None
+        # A tracing session started elsewhere (-X tracemalloc, an outer
+        # stage) is left running; its peak would not be this stage's, so
+        # none is recorded
+        traced = self.trace_memory and not tracemalloc.is_tracing()
+        if traced:
+            tracemalloc.start()
+        if profiler:
+            profiler.enable()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            if profiler:
+                profiler.disable()
+            peak = None
+            if traced:
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+            self.current_stage = None
+            self._finish_stage(name, seconds, self.calls[first_call:], peak, profiler)
+
+    def _finish_stage(self, name, seconds, calls, peak, profiler):
+        record = {"type": "stage", "stage": name, "seconds": round(seconds, 4)}
+        for total in _STAGE_TOTALS:
+            record[total] = 0
+        for call in calls:
+            record["calls"] += 1
+            record["cache_hits"] += call["cache_hit"]
+            record["retries"] += call["retries"]
+            record["errors"] += call["error"] is not None
+            record["prompt_tokens"] += call["prompt_tokens"]
+            record["completion_tokens"] += call["completion_tokens"]
+            record["cost_usd"] += call["cost_usd"] or 0.0
+        record["cost_usd"] = round(record["cost_usd"], 6)
+        if peak is not None:
+            record["peak_mb"] = round(peak / 1e6, 2)
+        if profiler is not None:
+            record["profile"] = self._dump_profile(name, profiler)
+        self.stages.append(record)
+
+    def _dump_profile(self, name, profiler):
+        import pstats
+
+        path = os.path.join(self.profile_dir or ".", f"profile_{name}.prof")
+        profiler.dump_stats(path)
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(10)
+        print(f"Profile of stage '{name}' ({path}):\n{out.getvalue()}")
+        return path
+
+    # -----------------------------
+    # OUTPUT
+    # -----------------------------
+
+    def summary(self) -> str:
+        lines = [f"{'stage':<12} {'seconds':>8} {'calls':>6} {'cached':>7} {'retries':>8} {'tokens':>9} {'cost $':>8}"]
+        for s in self.stages:
+            lines.append(
+                f"{s['stage']:<12} {s['seconds']:>8.2f} {s['calls']:>6} {s['cache_hits']:>7} "
+                f"{s['retries']:>8} {s['prompt_tokens'] + s['completion_tokens']:>9} {s['cost_usd']:>8.4f}"
+            )
+        return "\n".join(lines)
+
+    def write_jsonl(self, path: str) -> str:
+        with open(path, "w", encoding="utf-8") as f:
+            for record in self.stages + self.calls:
+                f.write(json.dumps(record) + "\n")
+        return path
+
+    def write_prometheus(self, path: str) -> str:
+        """Stage totals in the Prometheus text exposition format."""
+        metrics = [
+            ("mom_stage_seconds", "Wall time of the stage", "seconds"),
+            ("mom_stage_llm_calls", "LLM calls made by the stage", "calls"),
+            ("mom_stage_llm_cache_hits", "LLM calls served from the cache", "cache_hits"),
+            ("mom_stage_llm_retries", "LLM call retries", "retries"),
+            ("mom_stage_llm_errors", "LLM calls that failed after all retries", "errors"),
+            ("mom_stage_prompt_tokens", "Prompt tokens used", "prompt_tokens"),
+            ("mom_stage_completion_tokens", "Completion tokens used", "completion_tokens"),
+            ("mom_stage_cost_usd", "Estimated LLM cost in USD", "cost_usd"),
+            ("mom_stage_peak_memory_mb", "Peak traced memory in MB", "peak_mb"),
+        ]
+        lines = []
+        for metric, help_text, field in metrics:
+            samples = [s for s in self.stages if field in s]
+            if not samples:
+                continue
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} gauge")
+            for s in samples:
+                lines.append(f'{metric}{{stage="{s["stage"]}"}} {s[field]}')
+        queue_wait = sum(c["queue_wait"] for c in self.calls)
+        lines.append("# HELP mom_llm_queue_wait_seconds Time LLM calls waited for the rate limiter")
+        lines.append("# TYPE mom_llm_queue_wait_seconds gauge")
+        lines.append(f"mom_llm_queue_wait_seconds {round(queue_wait, 4)}")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        return path
+
+    def write(self, output_dir: str, fmt: str = None) -> str:
+        """Writes metrics.jsonl or metrics.prom (MOM_METRICS_FORMAT) into output_dir."""
+        fmt = fmt or METRICS_FORMAT
+        if fmt == "prometheus":
+            return self.write_prometheus(os.path.join(output_dir, "metrics.prom"))
+        return self.write_jsonl(os.path.join(output_dir, "metrics.jsonl"))
+
+
+_metrics = None
+
+
+def get_metrics() -> Optional[MetricsRecorder]:
+    """The recorder of the running pipeline, or None outside of one."""
+    return _metrics
+
+
+def set_metrics(recorder: Optional[MetricsRecorder]) -> None:
+    global _metrics
+    _metrics = recorder
@@ -1,24 +1,138 @@
 # mom_extraction.py
-from typing import List
+from typing import Callable, Dict, List, Optional
+import json
 import os
 import re
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
+from mom_generator.llm_routing import route_for, routed_completion, routed_stream
+from mom_generator.checkpoint import hash_inputs
+from mom_generator.transcript_model import Transcript, TranscriptLike, as_transcript
+from mom_generator.relevance import relevance_settings, relevant_transcript
+
+EXTRACTION_MODEL = "gpt-4"
+
+# Part of the checkpoint keys: bump when the extraction or summary-reduce
+# prompts, or the way their replies are read, change
+EXTRACTION_VERSION = 1
+
+# Map-reduce settings for transcripts larger than one prompt
+MAP_WINDOW_TOKENS = int(os.getenv("MOM_MAP_WINDOW_TOKENS", "3000"))
+MAP_WINDOW_OVERLAP = int(os.getenv("MOM_MAP_WINDOW_OVERLAP", "2"))
+MAP_MAX_WORKERS = int(os.getenv("MOM_MAP_MAX_WORKERS", "4"))
+
+# -----------------------------
+# REPLY VALIDATORS (model routing)
+# -----------------------------
+# Each returns a list of problems; an empty list means the reply of the
+# fast model is good enough and no larger model is tried.
+
+SPEAKER_BULLET = re.compile(r"^-\s*\[(Speaker \d|Unknown)\]\s*\S")
+BULLET = re.compile(r"^-\s*\S")
+SUMMARY_MAX_SENTENCES = 8
+
+
+def _bullet_lines_problems(reply: str, pattern) -> List[str]:
+    lines = [ln.strip() for ln in reply.splitlines() if ln.strip()]
+    bad = [ln for ln in lines if not pattern.match(ln)]
+    return [f"{len(bad)}/{len(lines)} lines not in the bullet format"] if bad else []
+
+
+def _speaker_bullet_problems(reply: str) -> List[str]:
+    return _bullet_lines_problems(reply, SPEAKER_BULLET)
+
+
+def _bullet_problems(reply: str) -> List[str]:
+    return _bullet_lines_problems(reply, BULLET)
+
+
+def _summary_problems(reply: str) -> List[str]:
+    text = reply.strip()
+    if not text:
+        return ["empty summary"]
+    if any(ln.lstrip().startswith(("-", "*", "•")) for ln in text.splitlines()):
+        return ["bullet points in the summary"]
+    if len(re.findall(r"[.!?](?:\s|$)", text)) > SUMMARY_MAX_SENTENCES:
+        return ["summary too long"]
+    return []
+
+
+def _sections_problems(reply: str) -> List[str]:
+    document = _parse_json_document(reply)
+    if not isinstance(document, dict):
+        return ["no JSON object"]
+    invalid = [
+        name for name, schema in MOM_SCHEMA.items()
+        if name not in document or not _matches_schema(document[name], schema)
+    ]
+    return [f"invalid sections: {', '.join(invalid)}"] if invalid else []
+
+
+# -----------------------------
+# STREAMED BULLET LISTS
+# -----------------------------
+
+# Receives (section, bullet line) as soon as a bullet is known
+OnItem = Optional[Callable[[str, str], None]]
+
+
+def _stream_bullets(section: str, prompt: str, validate, pattern, on_item: OnItem = None,
+                    **params) -> List[str]:
+    """
+    Runs a bullet-list prompt with a streamed reply and returns its
+    non-empty lines (the larger model's, if the reply was escalated).
+    on_item(section, line) only gets bullets of the reply that is kept:
+    the last tier's as they arrive, an earlier tier's once its complete
+    reply has passed validation (until then it may still be rejected).
+    """
+    last_tier = len(route_for(section, EXTRACTION_MODEL)) - 1
+    tier = 0
+    lines = []
+    for line in routed_stream(
+        model=EXTRACTION_MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        task=section,
+        validate=validate,
+        **params,
+    ):
+        if line is None:
+            tier += 1
+            lines = []
+            continue
+        line = line.strip()
+        if not line:
+            continue
+        lines.append(line)
+        if tier == last_tier and on_item is not None and pattern.match(line):
+            on_item(section, line)
+    if tier < last_tier:
+        _emit_items(section, [line for line in lines if pattern.match(line)], on_item)
+    return lines
+
+
+def _emit_items(section: str, lines: List[str], on_item: OnItem) -> None:
+    if on_item is not None:
+        for line in lines:
+            on_item(section, line)
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 # -----------------------------
 # ACTION ITEMS
 # -----------------------------
 
-def extract_action_items(transcript: str) -> List[str]:
+def extract_action_items(transcript: TranscriptLike, on_item: OnItem = None) -> List[str]:
 
 
     """
     Extract ONLY clear action items (tasks, follow-ups, assignments, deadlines)
     from any speaker-labeled transcript.
     Returns a list of bullet-style strings with Speaker 1/2.
+    on_item("action_items", line) gets each bullet as it streams in
+    (see _stream_bullets).
     """
 
+    # Only the lines that matter for this section go to the model
+    relevant = relevant_transcript(transcript, "action_items")
+
     prompt = f"""
 You are generating Minutes of Meeting.
 
@@ -35,31 +149,28 @@ IMPORTANT:
 - Do NOT include general discussion or questions.
 
 Transcript:
-{transcript}
+{relevant}
 
 Return ONLY bullet points in this format:
 - [Speaker X] Concrete task description with deadline if available.
 """
 
-    resp = client.chat.completions.create(
-        model="gpt-4",
-        messages=[{"role": "user", "content": prompt}],
+    lines = _stream_bullets(
+        "action_items", prompt, _speaker_bullet_problems, SPEAKER_BULLET, on_item,
         temperature=0.2,
         max_tokens=700,
     )
-    content = resp.choices[0].message.content.strip()
-    lines = [ln.strip() for ln in content.splitlines() if ln.strip()]
 
     # Fallback: simple pattern for obvious tasks if LLM returns nothing
     if not lines:
-        pattern = r'(Speaker \d: .*?(?:should|will|please|need to|prepare|update|review|send|share|finalize|draft).*)'
-        matches = re.findall(pattern, transcript, flags=re.I)
-        lines = []
-        for m in matches:
-            speaker_match = re.search(r'(Speaker \d)', m)
-            speaker = speaker_match.group(1) if speaker_match else "Speaker ?"
-            sentence = re.sub(r'^Speaker \d:\s*', '', m)
-            lines.append(f"- [{speaker}] {sentence}")
+        pattern = re.compile(r'should|will|please|need to|prepare|update|review|send|share|finalize|draft', re.I)
+        records = as_transcript(transcript)
+        for i in range(len(records)):
+            speaker = records.label(i)
+            sentence = records.text(i)
+            if speaker and speaker != "Unknown" and pattern.search(sentence):
+                lines.append(f"- [{speaker}] {sentence}")
+        _emit_items("action_items", lines, on_item)
 
     return lines
 
@@ -69,12 +180,17 @@ Return ONLY bullet points in this format:
 # DECISIONS (no duplicated tasks)
 # -----------------------------
 
-def extract_decisions(transcript: str) -> List[str]:
+def extract_decisions(transcript: TranscriptLike, on_item: OnItem = None) -> List[str]:
     """
     Extract only high-level decisions / agreements (NOT individual tasks).
     Returns a list of bullet-style strings.
+    on_item("decisions", line) gets each bullet as it streams in
+    (see _stream_bullets).
     """
 
+    # Only the lines that matter for this section go to the model
+    relevant = relevant_transcript(transcript, "decisions")
+
     prompt = f"""
 From the transcript below, extract only high-level decisions or agreements,
 not individual tasks.
@@ -90,20 +206,17 @@ Do NOT:
 - Include generic discussion.
 
 Transcript:
-{transcript}
+{relevant}
 
 Return ONLY bullet points like:
 - Short description of what was agreed.
 """
 
-    resp = client.chat.completions.create(
-        model="gpt-4",
-        messages=[{"role": "user", "content": prompt}],
+    lines = _stream_bullets(
+        "decisions", prompt, _bullet_problems, BULLET, on_item,
         temperature=0.2,
         max_tokens=500,
     )
-    content = resp.choices[0].message.content.strip()
-    lines = [ln.strip() for ln in content.splitlines() if ln.strip()]
 
     return lines
 
@@ -112,42 +225,44 @@ Return ONLY bullet points like:
 # QUESTIONS / ISSUES
 # -----------------------------
 
-def extract_questions(transcript: str) -> List[str]:
+def extract_questions(transcript: TranscriptLike, on_item: OnItem = None) -> List[str]:
     """
     Extract open questions or unresolved issues from the transcript.
     Returns a list of bullet-style strings with Speaker labels.
+    on_item("questions", line) gets each bullet as it streams in
+    (see _stream_bullets).
     """
 
+    # Only the lines that matter for this section go to the model
+    relevant = relevant_transcript(transcript, "questions")
+
     prompt = f"""
 From the transcript below, list the main open questions or issues
 raised during the meeting. Include who asked them using Speaker 1/2 labels.
 
 Transcript:
-{transcript}
+{relevant}
 
 Return ONLY bullet points like:
 - [Speaker X] Question text
 """
 
-    resp = client.chat.completions.create(
-        model="gpt-4",
-        messages=[{"role": "user", "content": prompt}],
+    lines = _stream_bullets(
+        "questions", prompt, _speaker_bullet_problems, SPEAKER_BULLET, on_item,
         temperature=0.3,
         max_tokens=500,
     )
-    content = resp.choices[0].message.content.strip()
-    lines = [ln.strip() for ln in content.splitlines() if ln.strip()]
 
     # Fallback: any line with a question mark
     if not lines:
-        for ln in transcript.splitlines():
-            if '?' in ln:
+        records = as_transcript(transcript)
+        for i in range(len(records)):
+            question = records.text(i)
+            if '?' in question:
                 # try to keep Speaker label
-                m = re.match(r'(Speaker \d:)\s*(.*)', ln)
-                if m:
-                    lines.append(f"- [{m.group(1).replace(':','')}] {m.group(2)}")
-                else:
-                    lines.append(f"- {ln}")
+                speaker = records.label(i)
+                lines.append(f"- [{speaker}] {question}" if speaker else f"- {records.line(i)}")
+        _emit_items("questions", lines, on_item)
 
     return lines
 
@@ -156,11 +271,14 @@ Return ONLY bullet points like:
 # SUMMARY
 # -----------------------------
 
-def summarize_discussion(transcript: str) -> str:
+def summarize_discussion(transcript: TranscriptLike) -> str:
     """
     Generate a concise 4–5 sentence summary for any meeting transcript.
     """
 
+    # Only the lines that matter for this section go to the model
+    relevant = relevant_transcript(transcript, "summary")
+
     prompt = f"""
 Summarize this meeting in 4–5 concise sentences.
 
@@ -176,19 +294,357 @@ Use neutral wording and do NOT list bullet points.
 Use Speaker 1 / Speaker 2 labels only if needed for clarity.
 
 Transcript:
-{transcript}
+{relevant}
 """
 
-    resp = client.chat.completions.create(
-        model="gpt-4",
+    summary = routed_completion(
+        model=EXTRACTION_MODEL,
         messages=[{"role": "user", "content": prompt}],
+        task="summary",
+        validate=_summary_problems,
         temperature=0.2,
         max_tokens=500,
-    )
-    summary = resp.choices[0].message.content.strip()
+    ).strip()
+    return summary
+
+
+# -----------------------------
+# STRUCTURED (single call for all sections)
+# -----------------------------
+
+# Sections that are bullet lists (everything but the summary)
+BULLET_SECTIONS = ("action_items", "decisions", "questions")
+
+# Expected shape of the JSON document; a list holds the schema of its items.
+MOM_SCHEMA = {
+    "summary": str,
+    "action_items": [{"speaker": str, "task": str}],
+    "decisions": [str],
+    "questions": [{"speaker": str, "question": str}],
+}
+
+
+def _matches_schema(value, schema) -> bool:
+    if isinstance(schema, dict):
+        return isinstance(value, dict) and all(
+            key in value and _matches_schema(value[key], sub)
+            for key, sub in schema.items()
+        )
+    if isinstance(schema, list):
+        return isinstance(value, list) and all(
+            _matches_schema(item, schema[0]) for item in value
+        )
+    return isinstance(value, schema)
+
+
+def _parse_json_document(content: str):
+    """Parse a JSON object from the model output, tolerating code fences."""
+    start, end = content.find("{"), content.rfind("}")
+    if start == -1 or end <= start:
+        return None
+    try:
+        return json.loads(content[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+
+
+class _JsonMembers:
+    """
+    The members of a JSON object arriving in pieces: feed() returns each
+    (key, value) as soon as its value is complete, so a section can be
+    used before the rest of the document is written. Anything before the
+    first "{" (a code fence) is skipped.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.pos = None
+        self.done = False
+        self.members = {}
+        self._decoder = json.JSONDecoder()
+
+    def _skip(self, pos: int, chars: str = " \t\r\n") -> int:
+        while pos < len(self.text) and self.text[pos] in chars:
+            pos += 1
+        return pos
+
+    def feed(self, chunk: str) -> List[tuple]:
+        self.text += chunk
+        if self.pos is None:
+            start = self.text.find("{")
+            if start == -1:
+                return []
+            self.pos = start + 1
+        found = []
+        while not self.done:
+            pos = self._skip(self.pos, " \t\r\n,")
+            if self.text.startswith("}", pos):
+                self.done = True
+                break
+            try:
+                key, pos = self._decoder.raw_decode(self.text, pos)
+                pos = self._skip(pos)
+                if not self.text.startswith(":", pos):
+                    # Incomplete, or not a JSON object after all
+                    break
+                value, pos = self._decoder.raw_decode(self.text, self._skip(pos + 1))
+            except json.JSONDecodeError:
+                break
+            # A number may still be growing until something follows it
+            if pos == len(self.text) and not isinstance(value, (str, list, dict)):
+                break
+            self.pos = pos
+            if isinstance(key, str):
+                self.members.setdefault(key, value)
+                found.append((key, value))
+        return found
+
+
+def _section_to_lines(name: str, value):
+    """Render a validated section in the same shape the per-section functions return."""
+    if name == "summary":
+        return value.strip()
+    if name == "action_items":
+        return [f"- [{item['speaker'].strip()}] {item['task'].strip()}" for item in value]
+    if name == "decisions":
+        return [f"- {item.strip()}" for item in value]
+    return [f"- [{item['speaker'].strip()}] {item['question'].strip()}" for item in value]
+
+
+def extract_mom_sections(transcript: TranscriptLike, on_item: OnItem = None) -> Dict[str, object]:
+    """
+    Extract summary, action items, decisions and questions with ONE call.
+    The response is validated section by section against MOM_SCHEMA; any
+    section that is missing or malformed falls back to its dedicated
+    extraction function.
+    Returns {"summary": str, "action_items": [...], "decisions": [...],
+    "questions": [...]} with the same bullet formatting as those functions.
+    The reply is streamed: on_item(section, line) gets the bullets of
+    each section as soon as that section is complete and valid (or as
+    they stream in, for a section that falls back).
+    """
+
+    # The lines that matter for any of the sections
+    relevant = relevant_transcript(transcript, list(MOM_SCHEMA), label="mom_sections")
+
+    prompt = f"""
+You are generating Minutes of Meeting from the speaker-labeled transcript below.
+
+Produce ONE JSON object with exactly these keys:
+- "summary": a concise 4–5 sentence summary in neutral wording (no bullet points).
+  Cover overall project/status, issues or delays, tools/systems mentioned,
+  main focus for the upcoming period, documentation or process updates,
+  and the next meeting plan if mentioned.
+- "action_items": list of {{"speaker": "Speaker X", "task": "..."}} for ONLY clear
+  tasks, follow-ups, assignments or work with deadlines. Include the deadline
+  in the task text if one is mentioned. Do NOT include decisions or questions.
+- "decisions": list of short strings describing high-level decisions or
+  agreements. Do NOT repeat concrete tasks already listed as action items.
+- "questions": list of {{"speaker": "Speaker X", "question": "..."}} for the main
+  open questions or issues raised during the meeting.
+
+Use the Speaker 1 / Speaker 2 labels exactly as in the text.
+Use an empty list when a section has no entries.
+
+Transcript:
+{relevant}
+
+Return ONLY the JSON object.
+"""
+
+    # Bullets of a section go out as soon as its list is complete and
+    # valid, while the rest of the reply is still being written; for a
+    # tier that may yet be rejected, only once its whole reply passed.
+    last_tier = len(route_for("mom_sections", EXTRACTION_MODEL)) - 1
+    tier = 0
+    members = _JsonMembers()
+    emitted = set()
+    for line in routed_stream(
+        model=EXTRACTION_MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        task="mom_sections",
+        validate=_sections_problems,
+        temperature=0.2,
+        max_tokens=2000,
+    ):
+        if line is None:
+            tier += 1
+            members = _JsonMembers()
+            continue
+        for name, value in members.feed(line + "\n"):
+            if (tier == last_tier and name in BULLET_SECTIONS and name not in emitted
+                    and _matches_schema(value, MOM_SCHEMA[name])):
+                emitted.add(name)
+                _emit_items(name, _section_to_lines(name, value), on_item)
+    document = members.members
+
+    fallbacks = {
+        "summary": summarize_discussion,
+        "action_items": extract_action_items,
+        "decisions": extract_decisions,
+        "questions": extract_questions,
+    }
+
+    sections = {}
+    for name, schema in MOM_SCHEMA.items():
+        value = document.get(name)
+        if value is not None and _matches_schema(value, schema):
+            sections[name] = _section_to_lines(name, value)
+            if name != "summary" and name not in emitted:
+                _emit_items(name, sections[name], on_item)
+        elif name == "summary":
+            print(f"Structured extraction: '{name}' invalid, falling back.")
+            sections[name] = fallbacks[name](transcript)
+        else:
+            print(f"Structured extraction: '{name}' invalid, falling back.")
+            sections[name] = fallbacks[name](transcript, on_item)
+
+    return sections
+
+
+# -----------------------------
+# MAP-REDUCE (long transcripts)
+# -----------------------------
+
+def split_transcript_windows(
+    transcript: TranscriptLike,
+    max_tokens: int = MAP_WINDOW_TOKENS,
+    overlap: int = MAP_WINDOW_OVERLAP,
+) -> List[Transcript]:
+    """
+    Split a speaker-labeled transcript into windows of whole timestamped
+    lines, up to `max_tokens` estimated tokens each. Every window after
+    the first repeats the last `overlap` lines of the previous one so
+    speaker turns keep their context; duplicates are merged away later.
+    """
+    return as_transcript(transcript).windows(max_tokens, overlap)
+
+
+def _dedup_key(line: str) -> str:
+    text = re.sub(r"^-\s*(\[[^\]]*\]\s*)?", "", line.lower())
+    return " ".join(re.findall(r"\w+", text))
+
+
+class _BulletMerger:
+    """Accepts bullets in order, rejecting exact and near-duplicates of earlier ones."""
+
+    def __init__(self, threshold: float = 0.8):
+        self.threshold = threshold
+        self.seen_tokens = []
+        self.seen_keys = set()
+
+    def add(self, line: str) -> bool:
+        key = _dedup_key(line)
+        if not key or key in self.seen_keys:
+            return False
+        tokens = set(key.split())
+        if any(
+            len(tokens & other) / len(tokens | other) >= self.threshold
+            for other in self.seen_tokens
+        ):
+            return False
+        self.seen_keys.add(key)
+        self.seen_tokens.append(tokens)
+        return True
+
+
+def _reduce_summaries(summaries: List[str]) -> str:
+    parts = "\n\n".join(f"Part {i + 1}:\n{s}" for i, s in enumerate(summaries))
+    prompt = f"""
+Below are summaries of consecutive parts of ONE meeting, in order.
+Combine them into a single summary of 4–5 concise sentences.
+
+Include:
+- Overall project/status.
+- Any issues or delays.
+- Tools/systems mentioned.
+- Main focus for the upcoming period.
+- Documentation or process updates.
+- Next meeting plan, if mentioned.
+
+Use neutral wording and do NOT list bullet points.
+Use Speaker 1 / Speaker 2 labels only if needed for clarity.
+
+Partial summaries:
+{parts}
+"""
+
+    return routed_completion(
+        model=EXTRACTION_MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        task="summary_reduce",
+        validate=_summary_problems,
+        temperature=0.2,
+        max_tokens=500,
+    ).strip()
+
+
+def _extract_window(window: Transcript, checkpoints=None, on_item: OnItem = None) -> Dict[str, object]:
+    if checkpoints is None:
+        return extract_mom_sections(window, on_item)
+
+    key = hash_inputs(EXTRACTION_VERSION, window.to_text(), route_for("mom_sections", EXTRACTION_MODEL), relevance_settings())
+    sections = checkpoints.load("extraction", key)
+    if sections is None:
+        sections = extract_mom_sections(window, on_item)
+        checkpoints.save("extraction", key, sections)
+    else:
+        for name in BULLET_SECTIONS:
+            _emit_items(name, sections[name], on_item)
+    return sections
+
+
+def _reduce_summaries_checkpointed(summaries: List[str], checkpoints=None) -> str:
+    if checkpoints is None:
+        return _reduce_summaries(summaries)
+
+    key = hash_inputs(EXTRACTION_VERSION, summaries, route_for("summary_reduce", EXTRACTION_MODEL))
+    summary = checkpoints.load("summary_reduce", key)
+    if summary is None:
+        summary = _reduce_summaries(summaries)
+        checkpoints.save("summary_reduce", key, summary)
     return summary
 
 
+def extract_mom_sections_mapreduce(
+    transcript: TranscriptLike,
+    max_tokens: int = MAP_WINDOW_TOKENS,
+    max_workers: int = MAP_MAX_WORKERS,
+    checkpoints=None,
+    on_item: OnItem = None,
+) -> Dict[str, object]:
+    """
+    Hierarchical version of extract_mom_sections for long transcripts.
+    Map: each window is extracted independently, `max_workers` at a time.
+    Reduce: bullet sections are merged and de-duplicated in window order,
+    and the partial summaries are condensed by one more call.
+    A transcript that fits in one window takes the single-call path.
+    Takes the labeled Transcript from assign_speakers (or its text).
+    With a CheckpointStore, finished windows are reused on re-runs.
+    on_item(section, line) gets each merged bullet as soon as its window
+    (and every window before it) is done, before the reduce step.
+    """
+    transcript = as_transcript(transcript)
+    windows = split_transcript_windows(transcript, max_tokens)
+    if len(windows) <= 1:
+        return _extract_window(transcript, checkpoints, on_item)
+
+    print(f"Map-reduce extraction over {len(windows)} windows...")
+    summaries = []
+    merged = {name: [] for name in BULLET_SECTIONS}
+    mergers = {name: _BulletMerger() for name in BULLET_SECTIONS}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(windows)))) as pool:
+        # In window order, each as soon as it is done
+        for partial in pool.map(lambda w: _extract_window(w, checkpoints), windows):
+            summaries.append(partial["summary"])
+            for name in BULLET_SECTIONS:
+                new = [line for line in partial[name] if mergers[name].add(line)]
+                merged[name].extend(new)
+                _emit_items(name, new, on_item)
+
+    return {"summary": _reduce_summaries_checkpointed(summaries, checkpoints), **merged}
+
+
 # -----------------------------
 # Simple manual test
 # -----------------------------
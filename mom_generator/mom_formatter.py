@@ -1,52 +1,244 @@
 # mom_formatter.py
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-from docx import Document
-from docx.shared import Inches
-import pandas as pd
-from fpdf import FPDF
-
-
-def format_mom_html(mom_text, output_path="data/mom_final.html"):
-    """Generate professional HTML email-ready MoM."""
-    html = f"""
+import functools
+import html
+import os
+import re
+from collections import namedtuple
+from datetime import datetime
+from string import Template
+from typing import Dict, Iterable, List, Tuple, Union
+
+from mom_generator.pdf_stream import StreamingPDF
+
+# Rendering libraries are imported inside the function that uses them,
+# so importing the pipeline does not pay for them up front.
+
+# Set to 0 to leave the speaker-labeled transcript out of the PDF
+PDF_TRANSCRIPT_APPENDIX = os.getenv("MOM_PDF_APPENDIX", "1") != "0"
+
+# One section of the minutes: its heading (None for text before the first
+# heading), its kind ("summary", "action", "decision", "question" or ""),
+# its paragraphs and its bullets as (speaker or None, text)
+MomSection = namedtuple("MomSection", "title kind paragraphs items")
+
+# Kind and display title of the headings written by build_mom_lines()
+SECTION_KINDS = {
+    "SUMMARY": ("summary", "Summary"),
+    "ACTION ITEMS": ("action", "Action Items"),
+    "DECISIONS": ("decision", "Decisions"),
+    "QUESTIONS / ISSUES": ("question", "Questions / Issues"),
+}
+
+# Bullet colour of every kind, shared by the HTML, PDF and DOCX output
+KIND_COLORS = {
+    "action": "27ae60",
+    "decision": "f39c12",
+    "question": "e74c3c",
+}
+
+_HEADING = re.compile(r"^([A-Z][A-Z /&]*):$")
+_ITEM = re.compile(r"^[-*•]\s*(?:\[(Speaker \d+|Unknown)\]\s*)?(.*)$")
+
+MomLike = Union[str, List[MomSection]]
+# A transcript file path, or its lines
+TranscriptSource = Union[str, Iterable[str]]
+
+
+# -----------------------------
+# PARSING (once per MoM)
+# -----------------------------
+
+def parse_mom(mom_text: str) -> List[MomSection]:
+    """
+    Sections of a MoM in the text format of build_mom_lines(): an
+    upper-case "HEADING:" line starts a section, "- [Speaker N] ..."
+    lines are its bullets, any other line a paragraph.
+    """
+    sections = []
+    current = None
+    for raw_line in mom_text.splitlines():
+        line = raw_line.strip()
+        if not line:
+            continue
+        heading = _HEADING.match(line)
+        if heading:
+            name = heading.group(1).strip()
+            kind, title = SECTION_KINDS.get(name, ("", name.title()))
+            current = MomSection(title, kind, [], [])
+            sections.append(current)
+            continue
+        if current is None:
+            current = MomSection(None, "", [], [])
+            sections.append(current)
+        item = _ITEM.match(line)
+        if item:
+            current.items.append((item.group(1), item.group(2)))
+        else:
+            current.paragraphs.append(line)
+    return sections
+
+
+def as_sections(mom: MomLike) -> List[MomSection]:
+    """Sections as is; text is parsed once."""
+    return parse_mom(mom) if isinstance(mom, str) else mom
+
+
+# -----------------------------
+# HTML
+# -----------------------------
+
+@functools.lru_cache(maxsize=None)
+def _html_template() -> Template:
+    """The page around the rendered sections, built once per process."""
+    item_styles = "\n".join(f".{kind} {{ color: #{color}; }}" for kind, color in KIND_COLORS.items())
+    return Template(f"""
 <!DOCTYPE html>
 <html>
 <head><title>Meeting Minutes</title>
+<meta charset="utf-8">
 <style>
 body {{ font-family: Arial, sans-serif; margin: 40px; line-height: 1.6; }}
 h1 {{ color: #2c3e50; border-bottom: 2px solid #3498db; padding-bottom: 10px; }}
 h2 {{ color: #34495e; margin-top: 30px; }}
 ul {{ margin-left: 20px; }}
-.action {{ color: #27ae60; }}
-.decision {{ color: #f39c12; }}
-.question {{ color: #e74c3c; }}
+{item_styles}
 </style>
 </head>
 <body>
 <h1>📋 Meeting Minutes</h1>
-<pre style="white-space: pre-wrap; font-family: inherit;">{mom_text}</pre>
-<p><small>Generated on {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M')}</small></p>
+$body
+<p><small>Generated on $generated</small></p>
 </body>
 </html>
-"""
+""")
+
+
+def _html_sections(sections: List[MomSection]) -> str:
+    escape = html.escape
+    parts = []
+    for section in sections:
+        if section.title:
+            parts.append(f"<h2>{escape(section.title)}</h2>")
+        parts.extend(f"<p>{escape(p)}</p>" for p in section.paragraphs)
+        if section.items:
+            css = f' class="{section.kind}"' if section.kind in KIND_COLORS else ""
+            parts.append("<ul>")
+            for speaker, text in section.items:
+                who = f"<strong>{escape(speaker)}:</strong> " if speaker else ""
+                parts.append(f"<li{css}>{who}{escape(text)}</li>")
+            parts.append("</ul>")
+    return "\n".join(parts)
+
+
+def format_mom_html(mom_text: MomLike, output_path="data/mom_final.html"):
+    """Generate professional HTML email-ready MoM (from its text or parsed sections)."""
+    page = _html_template().substitute(
+        body=_html_sections(as_sections(mom_text)),
+        generated=datetime.now().strftime('%Y-%m-%d %H:%M'),
+    )
     with open(output_path, "w", encoding="utf-8") as f:
-        f.write(html)
+        f.write(page)
     return output_path
 
-def format_mom_pdf(mom_text, output_path="data/mom_final.pdf"):
 
-    pdf = FPDF()
-    pdf.set_auto_page_break(auto=True, margin=15)
-    pdf.add_page()
-    pdf.set_font("Arial", size=12)
-    effective_width = pdf.w - 2 * pdf.l_margin # usable width
-    for line in mom_text.split("\n"):
+# -----------------------------
+# PDF
+# -----------------------------
 
-        if not line.strip():
-            pdf.ln(5)
-            continue
-        pdf.multi_cell(effective_width, 8, txt=line) # use explicit width
-    pdf.output(output_path)
-    return output_path
\ No newline at end of file
+def _rgb(color: str) -> Tuple[int, int, int]:
+    return int(color[0:2], 16), int(color[2:4], 16), int(color[4:6], 16)
+
+
+def format_mom_pdf(mom_text: MomLike, output_path="data/mom_final.pdf",
+                   transcript: TranscriptSource = None):
+    """
+    Generate the MoM as a PDF (from its text or parsed sections), with the
+    speaker-labeled transcript (a file path or its lines) as an appendix
+    if given. Pages are written to disk as they fill up (pdf_stream.py),
+    so memory stays flat however long the transcript.
+    """
+    with StreamingPDF(output_path) as pdf:
+        pdf.paragraph("Meeting Minutes", size=18, style="B", line_height=28.35)
+        for section in as_sections(mom_text):
+            if section.title:
+                pdf.space(14.17)
+                pdf.paragraph(section.title, size=14, style="B", line_height=25.51)
+            for paragraph in section.paragraphs:
+                pdf.paragraph(paragraph, line_height=22.68)
+            color = _rgb(KIND_COLORS.get(section.kind, "000000"))
+            for speaker, text in section.items:
+                bullet = f"- [{speaker}] {text}" if speaker else f"- {text}"
+                pdf.paragraph(bullet, line_height=22.68, color=color)
+
+        if transcript is not None:
+            pdf.new_page()
+            pdf.paragraph("Appendix: Speaker-Labeled Transcript", size=14, style="B", line_height=25.51)
+            lines = open(transcript, "r", encoding="utf-8") if isinstance(transcript, str) else transcript
+            try:
+                for line in lines:
+                    if line.strip():
+                        pdf.paragraph(line.strip(), size=9, line_height=11)
+            finally:
+                if isinstance(transcript, str):
+                    lines.close()
+    return output_path
+
+
+# -----------------------------
+# DOCX
+# -----------------------------
+
+def format_mom_docx(mom_text: MomLike, output_path="data/mom_final.docx"):
+    """Generate the MoM as a Word document (from its text or parsed sections)."""
+    from docx import Document
+    from docx.shared import RGBColor
+
+    document = Document()
+    document.add_heading("Meeting Minutes", level=0)
+    for section in as_sections(mom_text):
+        if section.title:
+            document.add_heading(section.title, level=1)
+        for paragraph in section.paragraphs:
+            document.add_paragraph(paragraph)
+        color = KIND_COLORS.get(section.kind)
+        for speaker, text in section.items:
+            bullet = document.add_paragraph(style="List Bullet")
+            if speaker:
+                bullet.add_run(f"{speaker}: ").bold = True
+            run = bullet.add_run(text)
+            if color:
+                run.font.color.rgb = RGBColor.from_string(color.upper())
+    document.add_paragraph(f"Generated on {datetime.now().strftime('%Y-%m-%d %H:%M')}")
+    document.save(output_path)
+    return output_path
+
+
+# -----------------------------
+# ALL FORMATS
+# -----------------------------
+
+RENDERERS = {
+    "html": format_mom_html,
+    "pdf": format_mom_pdf,
+    "docx": format_mom_docx,
+}
+
+
+def _render(fmt, sections, path, transcript=None):
+    if fmt == "pdf" and transcript is not None and PDF_TRANSCRIPT_APPENDIX:
+        return format_mom_pdf(sections, path, transcript=transcript)
+    return RENDERERS[fmt](sections, path)
+
+
+def format_mom(mom_text: MomLike, output_paths: Dict[str, str],
+               transcript: TranscriptSource = None) -> Dict[str, str]:
+    """
+    Renders the MoM once per format in `output_paths` ({"html": path, ...})
+    from a single parse, one format after the other: the renderers are
+    pure Python and hold the GIL, so threads would not run them any
+    faster (batch_pipeline.py already renders meetings in parallel, one
+    worker process each). The PDF gets `transcript` as an appendix
+    (unless MOM_PDF_APPENDIX=0). Returns {format: path}.
+    """
+    sections = as_sections(mom_text)
+    return {fmt: _render(fmt, sections, path, transcript) for fmt, path in output_paths.items()}
@@ -0,0 +1,216 @@
+# pdf_stream.py
+import functools
+import re
+import zlib
+from array import array
+from typing import List, Optional, Tuple
+
+# A4 in points, with the margins of the fpdf layout it replaces (10 mm,
+# and a 15 mm page break)
+PAGE_WIDTH = 595.28
+PAGE_HEIGHT = 841.89
+MARGIN = 28.35
+BOTTOM_MARGIN = 42.52
+
+# Objects with fixed numbers, so pages can point at them before they are
+# written at the end: the page tree, the catalog and one object per font
+_PAGES = 1
+_CATALOG = 2
+# style -> (resource name, base font, object number)
+_FONTS = {"": ("F1", "Helvetica", 3), "B": ("F2", "Helvetica-Bold", 4)}
+_FIRST_FREE = 5
+
+_COUNT = re.compile(rb"/Type /Pages /Count (\d+)")
+
+
+@functools.lru_cache(maxsize=None)
+def font_widths(style: str = "") -> array:
+    """
+    Glyph widths (1/1000 em) of the 256 WinAnsi codes of Helvetica (style
+    "") or Helvetica-Bold ("B"), taken from fpdf2's core font metrics once
+    per process and shared by every document.
+    """
+    from fpdf.fonts import CORE_FONTS_CHARWIDTHS
+
+    table = CORE_FONTS_CHARWIDTHS["helvetica" + style]
+    return array("H", (table[chr(code)] for code in range(256)))
+
+
+def encode(text: str) -> bytes:
+    """Text in the WinAnsi encoding of the core fonts ("?" for anything else)."""
+    return text.replace("\t", " ").encode("cp1252", "replace")
+
+
+def wrap(data: bytes, widths: array, size: float, max_width: float) -> List[bytes]:
+    """Encoded text broken into lines of at most `max_width` points, at spaces where possible."""
+    limit = max_width * 1000 / size
+    space = widths[32]
+    lines = []
+    line = []
+    used = 0
+    for word in data.split(b" "):
+        if not word:
+            continue
+        width = sum(map(widths.__getitem__, word))
+        if line and used + space + width > limit:
+            lines.append(b" ".join(line))
+            line = []
+        # A word wider than a line is cut wherever it has to be
+        while width > limit and not line:
+            cut = 0
+            cut_width = 0
+            for code in word:
+                if cut_width + widths[code] > limit:
+                    break
+                cut_width += widths[code]
+                cut += 1
+            cut = max(cut, 1)
+            lines.append(word[:cut])
+            word = word[cut:]
+            width = sum(map(widths.__getitem__, word))
+        if not word:
+            continue
+        used = used + space + width if line else width
+        line.append(word)
+    if line:
+        lines.append(b" ".join(line))
+    return lines or [b""]
+
+
+def _escape(data: bytes) -> bytes:
+    return data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+class StreamingPDF:
+    """
+    A PDF written page by page straight to disk: every finished page is
+    compressed and written out, so only the current page and the offset
+    of every object written so far are held in memory, however long the
+    document. Text is set in the built-in Helvetica fonts (nothing is
+    embedded), left aligned and wrapped at the margins.
+    Use as a context manager, or call close() to finish the file.
+    """
+
+    def __init__(self, path: str, compress: bool = True):
+        self.file = open(path, "wb")
+        self.compress = compress
+        self.pos = 0
+        # Offset of object n at index n - 1; the fixed objects come last
+        self.offsets = array("q", [0] * (_FIRST_FREE - 1))
+        self.kids = array("q")
+        self.ops = None
+        self.y = 0.0
+        self.color = None
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def page_count(self) -> int:
+        return len(self.kids) + (self.ops is not None)
+
+    # -----------------------------
+    # LAYOUT
+    # -----------------------------
+
+    def new_page(self) -> None:
+        if self.ops is not None:
+            self._end_page()
+        self.ops = []
+        self.y = PAGE_HEIGHT - MARGIN
+        self.color = None
+
+    def space(self, height: float) -> None:
+        """Vertical gap; it does not carry over to a new page."""
+        self.y -= height
+
+    def paragraph(self, text: str, size: float = 12, style: str = "",
+                  line_height: Optional[float] = None,
+                  color: Tuple[int, int, int] = (0, 0, 0)) -> None:
+        """Text wrapped at the margins, starting a new page whenever the current one is full."""
+        line_height = line_height or size * 1.2
+        widths = font_widths(style)
+        name = _FONTS[style][0]
+        rgb = b"%.3f %.3f %.3f rg " % tuple(c / 255 for c in color)
+        for line in wrap(encode(text), widths, size, PAGE_WIDTH - 2 * MARGIN):
+            if self.ops is None or self.y - line_height < BOTTOM_MARGIN:
+                self.new_page()
+            # Baseline about where fpdf puts it in a cell of this height
+            baseline = self.y - (line_height + size * 0.7) / 2
+            self.ops.append(
+                b"BT %s/%s %.2f Tf 1 0 0 1 %.2f %.2f Tm (%s) Tj ET"
+                % (rgb if color != self.color else b"", name.encode(), size, MARGIN, baseline, _escape(line))
+            )
+            self.color = color
+            self.y -= line_height
+
+    # -----------------------------
+    # FILE
+    # -----------------------------
+
+    def _write(self, data: bytes) -> None:
+        self.file.write(data)
+        self.pos += len(data)
+
+    def _object(self, number: int, body: bytes) -> None:
+        if number == len(self.offsets) + 1:
+            self.offsets.append(self.pos)
+        else:
+            self.offsets[number - 1] = self.pos
+        self._write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+
+    def _end_page(self) -> None:
+        content = b"\n".join(self.ops)
+        if self.compress:
+            content = zlib.compress(content)
+            header = b"<< /Length %d /Filter /FlateDecode >>" % len(content)
+        else:
+            header = b"<< /Length %d >>" % len(content)
+        contents = len(self.offsets) + 1
+        self._object(contents, header + b"\nstream\n" + content + b"\nendstream")
+        fonts = b" ".join(b"/%s %d 0 R" % (name.encode(), number) for name, _, number in _FONTS.values())
+        page = len(self.offsets) + 1
+        self._object(page, (
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %.2f %.2f] "
+            b"/Resources << /Font << %s >> >> /Contents %d 0 R >>"
+        ) % (_PAGES, PAGE_WIDTH, PAGE_HEIGHT, fonts, contents))
+        self.kids.append(page)
+        self.ops = None
+
+    def close(self) -> None:
+        if self.file.closed:
+            return
+        try:
+            if self.ops is not None or not self.kids:
+                if self.ops is None:
+                    self.new_page()
+                self._end_page()
+            for name, base_font, number in _FONTS.values():
+                self._object(number, (
+                    b"<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>"
+                    % base_font.encode()
+                ))
+            kids = b" ".join(b"%d 0 R" % page for page in self.kids)
+            self._object(_PAGES, b"<< /Type /Pages /Count %d /Kids [%s] >>" % (len(self.kids), kids))
+            self._object(_CATALOG, b"<< /Type /Catalog /Pages %d 0 R >>" % _PAGES)
+
+            xref = self.pos
+            entries = b"".join(b"%010d 00000 n \n" % offset for offset in self.offsets)
+            self._write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(self.offsets) + 1) + entries)
+            self._write(
+                b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                % (len(self.offsets) + 1, _CATALOG, xref)
+            )
+        finally:
+            self.file.close()
+
+
+def pdf_page_count(path: str) -> int:
+    """Pages of a PDF written by StreamingPDF, read from its page tree."""
+    with open(path, "rb") as f:
+        match = _COUNT.search(f.read())
+    return int(match.group(1)) if match else 0
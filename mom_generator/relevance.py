@@ -0,0 +1,204 @@
+# relevance.py
+import os
+import re
+import threading
+from collections import namedtuple
+from typing import List
+
+from mom_generator.chunking import estimate_tokens
+from mom_generator.transcript_model import Transcript
+
+# Set to 0 to send the whole transcript with every extraction prompt
+RELEVANCE_ENABLED = os.getenv("MOM_RELEVANCE", "1") != "0"
+
+# Lines kept around every line selected by a seed vocabulary, before and
+# after (summary lines are picked on their own and get no context)
+RELEVANCE_CONTEXT = int(os.getenv("MOM_RELEVANCE_CONTEXT", "1"))
+
+# Transcripts shorter than this are sent whole: there is nothing to save
+RELEVANCE_MIN_LINES = int(os.getenv("MOM_RELEVANCE_MIN_LINES", "20"))
+
+# Share of the lines selected (before context) for each extraction type.
+# "summary" has no seed terms: it keeps the most informative lines
+# (highest total IDF), which drops greetings and one-word replies.
+KEEP_FRACTION = {
+    "action_items": 0.15,
+    "decisions": 0.1,
+    "questions": 0.15,
+    "summary": 0.3,
+}
+
+# Seed vocabularies, from the regex fallbacks of mom_extraction. "?" is a
+# token of its own, so questions are scored like any other term.
+SEED_TERMS = {
+    "action_items": (
+        "should", "will", "please", "need", "prepare", "update", "review",
+        "send", "share", "finalize", "draft", "deadline", "by", "tomorrow",
+    ),
+    "decisions": (
+        "agree", "agreed", "decide", "decided", "let's", "plan", "go",
+        "finalize", "confirm", "confirmed", "next",
+    ),
+    "questions": ("?", "how", "what", "why", "when", "issue", "problem", "unclear"),
+}
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN = re.compile(r"[a-z0-9']+|\?|\n")
+# Timestamps and speaker labels are on every line and say nothing
+_LINE_PREFIX = re.compile(r"^\d{1,2}:\d{2}\s+(?:(?:Speaker \d|Unknown):\s*)?", re.M)
+
+# Token occurrences of a transcript as parallel arrays, with the IDF of
+# every term and the information (total IDF of distinct terms) of every line
+TermMatrix = namedtuple("TermMatrix", "docs terms vocab num_docs idf information")
+
+
+# -----------------------------
+# SCORING (vectorized)
+# -----------------------------
+
+def build_term_matrix(lines: List[str]) -> TermMatrix:
+    """
+    Tokenizes all lines in one pass (a newline token separates them) and
+    computes the BM25 IDF and the information of every line. Built once
+    and shared by the scores of every extraction type.
+    """
+    import numpy as np
+
+    text = _LINE_PREFIX.sub("", "\n".join(lines)).lower()
+    vocab = {"\n": 0}
+    ids = np.array([vocab.setdefault(t, len(vocab)) for t in _TOKEN.findall(text)], dtype=np.int64)
+    newline = ids == 0
+    docs = np.cumsum(newline)[~newline]
+    terms = ids[~newline]
+    num_docs, num_terms = len(lines), len(vocab)
+
+    # Distinct (line, term) pairs: docs are ascending, so a sort groups them
+    pairs = np.sort(docs * num_terms + terms)
+    if len(pairs):
+        pairs = pairs[np.concatenate(([True], pairs[1:] != pairs[:-1]))]
+    df = np.bincount(pairs % num_terms, minlength=num_terms)
+    idf = np.log1p((num_docs - df + 0.5) / (df + 0.5))
+    information = np.bincount(pairs // num_terms, weights=idf[pairs % num_terms], minlength=num_docs)
+    return TermMatrix(docs, terms, vocab, num_docs, idf, information)
+
+
+def score_lines(matrix: TermMatrix, kind: str):
+    """
+    Relevance of every line for one extraction type, as a NumPy array:
+    BM25 against the seed vocabulary of `kind` times the information of
+    the line, or, for "summary", the information alone.
+    """
+    import numpy as np
+
+    docs, terms, vocab, num_docs, idf, information = matrix
+    if kind not in SEED_TERMS:
+        return information
+
+    query = np.array([vocab[t] for t in SEED_TERMS[kind] if t in vocab], dtype=np.int64)
+    if not len(query):
+        return np.zeros(num_docs)
+    # Column of each term in the query, -1 for the rest of the vocabulary
+    column = np.full(len(vocab), -1, dtype=np.int64)
+    column[query] = np.arange(len(query))
+    hits = column[terms] >= 0
+    tf = np.bincount(
+        docs[hits] * len(query) + column[terms[hits]], minlength=num_docs * len(query)
+    ).reshape(num_docs, len(query))
+
+    length = np.bincount(docs, minlength=num_docs)
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / max(length.mean(), 1e-9))
+    weights = tf * (BM25_K1 + 1) / (tf + norm[:, None])
+    # Weighted by how informative the line is, so "How are you?" loses
+    # to a question about the project
+    return (weights @ idf[query]) * information / max(information.mean(), 1e-9)
+
+
+def select_lines(scores, keep_fraction: float, context: int = RELEVANCE_CONTEXT):
+    """
+    Boolean mask of the lines to keep: the top `keep_fraction` of the
+    lines with a positive score, each widened by `context` lines.
+    """
+    import numpy as np
+
+    keep = max(1, int(round(len(scores) * keep_fraction)))
+    top = np.argsort(-scores, kind="stable")[:keep]
+    mask = np.zeros(len(scores), dtype=bool)
+    mask[top[scores[top] > 0]] = True
+    if context > 0:
+        mask = np.convolve(mask, np.ones(2 * context + 1), mode="same") > 0
+    return mask
+
+
+# -----------------------------
+# FILTER
+# -----------------------------
+
+class RelevanceStats:
+    """Estimated prompt tokens per extraction type, with and without the filter."""
+
+    def __init__(self):
+        self.kinds = {}
+        self._lock = threading.Lock()
+
+    def record(self, kind, full_tokens, kept_tokens):
+        with self._lock:
+            stats = self.kinds.setdefault(kind, {"calls": 0, "full": 0, "kept": 0})
+            stats["calls"] += 1
+            stats["full"] += full_tokens
+            stats["kept"] += kept_tokens
+
+    def report(self) -> str:
+        lines = []
+        for kind, s in sorted(self.kinds.items()):
+            saved = 1 - s["kept"] / s["full"] if s["full"] else 0.0
+            lines.append(
+                f"  {kind:<18} {s['calls']:>4} calls, {s['full']:>8} -> {s['kept']:>8} "
+                f"transcript tokens ({saved:.0%} less)"
+            )
+        return "Relevance filter:\n" + "\n".join(lines) if lines else "Relevance filter: not used"
+
+
+_stats = RelevanceStats()
+
+
+def get_relevance_stats() -> RelevanceStats:
+    return _stats
+
+
+def relevance_settings():
+    """Everything the filter output depends on, for checkpoint keys."""
+    if not RELEVANCE_ENABLED:
+        return None
+    return RELEVANCE_CONTEXT, RELEVANCE_MIN_LINES, sorted(KEEP_FRACTION.items()), sorted(SEED_TERMS.items())
+
+
+def relevant_transcript(transcript, kinds, label: str = None) -> str:
+    """
+    The lines of a speaker-labeled transcript (text or Transcript) that
+    matter for the given extraction type(s), as text in their original
+    order. With several kinds the selections are combined (one prompt for
+    all MoM sections).
+    Short transcripts, or any when MOM_RELEVANCE=0, come back unchanged.
+    The token reduction is recorded under `label` (default: the kinds).
+    """
+    kinds = (kinds,) if isinstance(kinds, str) else tuple(kinds)
+    if isinstance(transcript, Transcript):
+        lines = list(transcript.lines())
+        transcript = "\n".join(lines)
+    else:
+        lines = [ln for ln in transcript.splitlines() if ln.strip()]
+    if not RELEVANCE_ENABLED or len(lines) < RELEVANCE_MIN_LINES:
+        return transcript
+
+    matrix = build_term_matrix(lines)
+    mask = None
+    for kind in kinds:
+        context = RELEVANCE_CONTEXT if kind in SEED_TERMS else 0
+        selected = select_lines(score_lines(matrix, kind), KEEP_FRACTION.get(kind, 0.3), context)
+        mask = selected if mask is None else mask | selected
+    kept = "\n".join(line for line, keep in zip(lines, mask) if keep)
+    _stats.record(label or "+".join(kinds), estimate_tokens(transcript), estimate_tokens(kept))
+    return kept
@@ -0,0 +1,118 @@
+# sentence_splitter.py
+import re
+from typing import List, Tuple
+
+# -----------------------------
+# RULES
+# -----------------------------
+# Tuned to the behaviour of NLTK's English punkt model on our transcripts:
+#   - "?" and "!" end a sentence whenever whitespace follows, even before
+#     lowercase ASR text ("Right? so ...")
+#   - "." ends a sentence unless the word before it is a known
+#     abbreviation or an initial ("Mr.", "e.g.", "J.")
+#   - decimals and times ("2.5 years", "10.30") never split, since a
+#     boundary needs whitespace after the punctuation
+#   - an ellipsis only ends a sentence before an uppercase word that goes
+#     on ("next week... Sounds good"), not before a one-word sentence
+#     that finishes the thought ("So, that is... Fine.")
+#   - closing quotes and brackets stay with the sentence they close
+
+ABBREVIATIONS = frozenset({
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "mt", "vs", "etc",
+    "e.g", "i.e", "a.m", "p.m", "approx", "dept", "est", "fig", "inc", "ltd",
+    "co", "corp", "no", "jan", "feb", "mar", "apr", "jun", "jul", "aug",
+    "sep", "sept", "oct", "nov", "dec", "u.s", "u.k",
+})
+
+# Sentence-final punctuation (plus closing quotes/brackets) followed by
+# whitespace
+_BOUNDARY = re.compile(r"""([.?!]+)["')\]]*(?=\s)""")
+
+# Characters looked at before a period; longer than any abbreviation, so a
+# longer word can never be mistaken for one
+_WORD_WINDOW = max(len(a) for a in ABBREVIATIONS) + 2
+_WHITESPACE = re.compile(r"\s")
+_NEXT_WORD = re.compile(r"\s*(\S+)")
+
+
+def _ends_sentence(text: str, m: re.Match) -> bool:
+    punct = m.group(1)
+    if "?" in punct or "!" in punct:
+        return True
+    if len(punct) > 1:
+        # Ellipsis: a break only when the next word starts a sentence of its own
+        nxt = _NEXT_WORD.match(text, m.end())
+        if not nxt:
+            return False
+        word = nxt.group(1)
+        return word[0].isupper() and not word.rstrip("\"')]").endswith((".", "?", "!"))
+
+    # Word the period belongs to: back to the previous whitespace
+    tail = text[max(0, m.start() - _WORD_WINDOW):m.start()]
+    word = _WHITESPACE.split(tail)[-1].lstrip("\"'([").lower()
+    if word in ABBREVIATIONS:
+        return False
+    if len(word) == 1 and word.isalpha():
+        return False  # an initial
+    return True
+
+
+def _strip_span(text: str, start: int, end: int):
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def sentence_spans(text: str, spans: List[Tuple[int, int]]) -> List[List[Tuple[int, int]]]:
+    """
+    Sentence offsets within each text[start:end] range of `spans`
+    (ascending and non-overlapping, e.g. the segments of a transcript
+    buffer), found in one pass of a single precompiled pattern over the
+    whole range and without copying the text. A range end always ends a
+    sentence. Returns one list of stripped, non-empty (start, end) per span.
+    """
+    results = []
+    if not spans:
+        return results
+    matches = _BOUNDARY.finditer(text, spans[0][0], spans[-1][1])
+    m = next(matches, None)
+    for start, end in spans:
+        sentences = []
+        while m is not None and m.start() < start:
+            m = next(matches, None)
+        while m is not None and m.end() <= end:
+            if _ends_sentence(text, m):
+                span = _strip_span(text, start, m.end())
+                if span[0] < span[1]:
+                    sentences.append(span)
+                start = m.end()
+            m = next(matches, None)
+        span = _strip_span(text, start, end)
+        if span[0] < span[1]:
+            sentences.append(span)
+        results.append(sentences)
+    return results
+
+
+def split_sentences_batch(texts: List[str]) -> List[List[str]]:
+    """
+    Splits many texts (e.g. every timestamp segment of a transcript) into
+    sentences in one pass over their joined form (see sentence_spans).
+    Returns one list of stripped, non-empty sentences per input text.
+    """
+    joined = "\n".join(texts)
+    spans = []
+    start = 0
+    for text in texts:
+        spans.append((start, start + len(text)))
+        start += len(text) + 1
+    return [
+        [joined[s:e] for s, e in sentences] for sentences in sentence_spans(joined, spans)
+    ]
+
+
+def split_sentences(text: str) -> List[str]:
+    """Sentences of a single text (see split_sentences_batch)."""
+    return split_sentences_batch([text])[0]
@@ -0,0 +1,223 @@
+# transcript_model.py
+import re
+from array import array
+from typing import Iterable, List, Optional, Tuple, Union
+
+from mom_generator.chunking import estimate_tokens, pack_segments
+from mom_generator.sentence_splitter import sentence_spans
+
+# Speaker ids in Transcript.speakers: N for "Speaker N", 0 for "Unknown",
+# -1 for a record that has not been labeled
+NO_LABEL = -1
+UNKNOWN = 0
+
+# "<timestamp> [<label>:] <text>", a record per timestamp at a line start
+_RECORD = re.compile(r"^(\d{1,2}:\d{2})[ \t]*(?:(Speaker \d|Unknown):)?", re.M)
+
+# Line breaks inside a record (a sentence wrapped onto a line of its
+# own) become spaces, so every record serializes to one line. Same
+# length, so the offsets into the text stay valid.
+_UNWRAP = {ord("\n"): " ", ord("\r"): " "}
+
+# Estimated tokens of the "<timestamp> " and "Speaker N: " prefixes of a
+# serialized record, for window sizing
+_STAMP_TOKENS = 2
+_LABEL_TOKENS = 3
+
+
+def speaker_id(label: Optional[str]) -> int:
+    """Speaker id of "Speaker N" / "Unknown" (NO_LABEL for None)."""
+    if label is None:
+        return NO_LABEL
+    return UNKNOWN if label == "Unknown" else int(label.rsplit(" ", 1)[-1])
+
+
+def speaker_label(sid: int) -> Optional[str]:
+    """Inverse of speaker_id()."""
+    if sid == NO_LABEL:
+        return None
+    return "Unknown" if sid == UNKNOWN else f"Speaker {sid}"
+
+
+def _strip(text, start, end):
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+class Transcript:
+    """
+    A transcript as parallel arrays over one shared text buffer: for every
+    record (a timestamp segment or a sentence) the offsets of its
+    timestamp and of its text, and its speaker id. Stages pass it along
+    and refine it (segments -> sentences -> labels) without copying or
+    re-parsing text; it is serialized to the line format
+    ("<timestamp> [Speaker N: ]<text>") only for files and prompts.
+    Iterating or indexing yields (timestamp, text) tuples, so it can
+    stand in for the lists of tuples the older code passes around.
+    """
+
+    __slots__ = ("buffer", "stamp_starts", "stamp_ends", "starts", "ends", "speakers")
+
+    def __init__(self, buffer: str = ""):
+        self.buffer = buffer
+        self.stamp_starts = array("q")
+        self.stamp_ends = array("q")
+        self.starts = array("q")
+        self.ends = array("q")
+        self.speakers = array("b")
+
+    def append(self, stamp_start, stamp_end, start, end, speaker=NO_LABEL):
+        self.stamp_starts.append(stamp_start)
+        self.stamp_ends.append(stamp_end)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.speakers.append(speaker)
+
+    # -----------------------------
+    # BUILDING (edges)
+    # -----------------------------
+
+    @classmethod
+    def parse(cls, text: str) -> "Transcript":
+        """
+        Records of a plain or speaker-labeled transcript: one per timestamp
+        at the start of a line, up to the next one; lines without a
+        timestamp are joined to the record before them. Text before the
+        first timestamp is ignored.
+        """
+        transcript = cls(text)
+        matches = list(_RECORD.finditer(text))
+        wrapped = False
+        for k, m in enumerate(matches):
+            end = matches[k + 1].start() if k + 1 < len(matches) else len(text)
+            start, end = _strip(text, m.end(), end)
+            wrapped = wrapped or text.find("\n", start, end) != -1
+            transcript.append(m.start(1), m.end(1), start, end, speaker_id(m.group(2)))
+        if wrapped:
+            transcript.buffer = text.translate(_UNWRAP)
+        return transcript
+
+    @classmethod
+    def from_segments(cls, segments: Iterable[Tuple[str, str]]) -> "Transcript":
+        """Records of (timestamp, text) tuples, copied into a new buffer once."""
+        parts = []
+        offsets = []
+        pos = 0
+        for timestamp, text in segments:
+            offsets.append((pos, pos + len(timestamp), pos + len(timestamp) + 1))
+            parts.append(f"{timestamp} {text.translate(_UNWRAP)}")
+            pos += len(timestamp) + len(text) + 2
+        transcript = cls("\n".join(parts))
+        for (stamp_start, stamp_end, start), part in zip(offsets, parts):
+            transcript.append(stamp_start, stamp_end, start, stamp_start + len(part))
+        return transcript
+
+    @classmethod
+    def concat(cls, parts: Iterable["Transcript"]) -> "Transcript":
+        """One transcript of several (e.g. the chunks of a live session), in order."""
+        parts = list(parts)
+        transcript = cls("\n".join(p.buffer for p in parts))
+        shift = 0
+        for p in parts:
+            transcript.stamp_starts.extend(x + shift for x in p.stamp_starts)
+            transcript.stamp_ends.extend(x + shift for x in p.stamp_ends)
+            transcript.starts.extend(x + shift for x in p.starts)
+            transcript.ends.extend(x + shift for x in p.ends)
+            transcript.speakers.extend(p.speakers)
+            shift += len(p.buffer) + 1
+        return transcript
+
+    # -----------------------------
+    # RECORDS
+    # -----------------------------
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __iter__(self):
+        buffer = self.buffer
+        for stamp_start, stamp_end, start, end in zip(
+            self.stamp_starts, self.stamp_ends, self.starts, self.ends
+        ):
+            yield buffer[stamp_start:stamp_end], buffer[start:end]
+
+    def __getitem__(self, i):
+        """(timestamp, text) of record i; a slice gives a list of them."""
+        if isinstance(i, slice):
+            return [self[k] for k in range(*i.indices(len(self)))]
+        return self.timestamp(i), self.text(i)
+
+    def timestamp(self, i: int) -> str:
+        return self.buffer[self.stamp_starts[i]:self.stamp_ends[i]]
+
+    def text(self, i: int) -> str:
+        return self.buffer[self.starts[i]:self.ends[i]]
+
+    def label(self, i: int) -> Optional[str]:
+        return speaker_label(self.speakers[i])
+
+    def take(self, indices: Iterable[int]) -> "Transcript":
+        """The given records, as a transcript over the same buffer."""
+        view = Transcript(self.buffer)
+        for i in indices:
+            view.append(
+                self.stamp_starts[i], self.stamp_ends[i], self.starts[i], self.ends[i], self.speakers[i]
+            )
+        return view
+
+    def split_sentences(self) -> "Transcript":
+        """
+        One record per sentence of every record, over the same buffer, with
+        the timestamp and speaker of the record it came from.
+        """
+        sentences = Transcript(self.buffer)
+        spans = sentence_spans(self.buffer, list(zip(self.starts, self.ends)))
+        for i, record_sentences in enumerate(spans):
+            for start, end in record_sentences:
+                sentences.append(
+                    self.stamp_starts[i], self.stamp_ends[i], start, end, self.speakers[i]
+                )
+        return sentences
+
+    def windows(self, max_tokens: int, overlap: int = 0) -> List["Transcript"]:
+        """
+        Consecutive views of whole records of up to `max_tokens` estimated
+        tokens each, packed like the chunks of chunk_spans() (a single
+        larger record gets a window of its own, and every window after the
+        first repeats the last `overlap` records of the previous one, as
+        long as they leave room).
+        """
+        buffer = self.buffer
+        costs = [
+            estimate_tokens(buffer, start, end) + _STAMP_TOKENS + (_LABEL_TOKENS if sid != NO_LABEL else 0)
+            for start, end, sid in zip(self.starts, self.ends, self.speakers)
+        ]
+        return [self.take(range(ctx, end)) for ctx, _, end in pack_segments(costs, max_tokens, overlap)]
+
+    # -----------------------------
+    # SERIALIZATION (edges)
+    # -----------------------------
+
+    def line(self, i: int) -> str:
+        label = self.label(i)
+        prefix = f"{self.timestamp(i)} {label}: " if label else f"{self.timestamp(i)} "
+        return prefix + self.text(i)
+
+    def lines(self) -> Iterable[str]:
+        return (self.line(i) for i in range(len(self)))
+
+    def to_text(self) -> str:
+        return "\n".join(self.lines())
+
+    __str__ = to_text
+
+
+TranscriptLike = Union[str, Transcript]
+
+
+def as_transcript(transcript: TranscriptLike) -> Transcript:
+    """A Transcript as is; text is parsed once."""
+    return transcript if isinstance(transcript, Transcript) else Transcript.parse(transcript)
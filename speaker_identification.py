@@ -1,59 +1,120 @@
+import contextlib
 import re
-from openai import OpenAI
+import json
+from concurrent.futures import ThreadPoolExecutor
 import os
-import nltk
-
-nltk.data.path.append(r"C:\Users\DigitalBluze\nltk_data")
-from nltk.tokenize import PunktSentenceTokenizer
-
-tokenizer = PunktSentenceTokenizer()
-# text = "Hello. This is a test."
-# print(tokenizer.tokenize(text))
-from nltk.tokenize import sent_tokenize
-
-# Initialize OpenAI client once
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from mom_generator.llm_routing import route_for, routed_stream
+from mom_generator.checkpoint import hash_inputs
+from mom_generator.chunking import estimate_tokens, pack_by_tokens
+from mom_generator.transcript_model import UNKNOWN, Transcript, as_transcript, speaker_id, speaker_label
+from speaker_prelabel import prelabel
+
+SPEAKER_MODEL = "gpt-4"
+
+# Part of the checkpoint keys: bump when the labeling prompts or the
+# reply protocols change
+SPEAKER_PROMPT_VERSION = 1
+
+# Batches labeled at once, and read-only sentences carried over from the
+# previous batch so speaker identities can be aligned across boundaries
+SPEAKER_MAX_WORKERS = int(os.getenv("SPEAKER_MAX_WORKERS", "4"))
+SPEAKER_CONTEXT_SENTENCES = int(os.getenv("SPEAKER_CONTEXT_SENTENCES", "3"))
+
+# Label obvious turns locally (speaker_prelabel.py) and send only the
+# ambiguous sentences to the LLM
+SPEAKER_PRELABEL = os.getenv("SPEAKER_PRELABEL", "1") != "0"
+
+# Output cap per labeling call; batches are sized to fill this safely
+SPEAKER_MAX_OUTPUT_TOKENS = 2000
+SPEAKER_OUTPUT_SAFETY = 0.75
+# "<timestamp> Speaker N: " prefix added to every echoed sentence
+LABEL_OVERHEAD_TOKENS = 8
+
+LABELED_LINE = re.compile(r"^(\d{1,2}:\d{2})\s+(Speaker \d|Unknown):\s*(.*)$")
+
+# "full": the model echoes every sentence with its label.
+# "compact": the model returns only "<number>: <label>" pairs and the
+# labeled lines are rebuilt locally from the original sentences.
+SPEAKER_PROTOCOL = os.getenv("SPEAKER_PROTOCOL", "compact")
+
+# Compact protocol: prompt budget for the numbered sentences, and reply
+# tokens per "<number>: <label>" line
+SPEAKER_COMPACT_INPUT_TOKENS = int(os.getenv("SPEAKER_COMPACT_INPUT_TOKENS", "3000"))
+COMPACT_REPLY_TOKENS = 4
+# "[n] <timestamp> " prefix in front of every numbered sentence
+COMPACT_INDEX_TOKENS = 6
+
+COMPACT_LABELS = {"1": "Speaker 1", "2": "Speaker 2", "u": "Unknown", "unknown": "Unknown"}
+COMPACT_REPLY_LINE = re.compile(r"^\W*(\d+)\W+(?:speaker\s*)?(1|2|unknown|u)\b", flags=re.I)
+
+# Put in a prompt where sentences were left out between two that are
+# sent (pre-labeling sends only the ambiguous ones), so the model does
+# not read them as one following the other
+GAP_LINE = "[...]"
+GAP_RULE = f"""
+A "{GAP_LINE}" line marks sentences left out here. The sentences before and
+after it were NOT said one right after the other: do not apply the
+conversational logic across it, and output nothing for it.
+"""
 
 
 def split_into_segments(text):
     """
-    Split transcript text into list of (timestamp, content).
+    Split transcript text into (timestamp, content) records: a Transcript
+    over the text itself, with no copies of the segments.
     """
-    pattern = r"(\d{1,2}:\d{2})"
-    parts = re.split(pattern, text)
-    segments = []
-
-    i = 1
-    while i < len(parts) - 1:
-        timestamp = parts[i].strip()
-        content = parts[i + 1].strip()
-        segments.append((timestamp, content))
-        i += 2
-
-    return segments
+    return Transcript.parse(text)
 
 
 def split_segment_into_sentences(segments):
     """
     Given segments of (timestamp, text), split each text into sentences.
-    Return list of (timestamp, sentence).
+    Return a Transcript of (timestamp, sentence) records.
+    All segments are split in one pass by the built-in splitter
+    (mom_generator/sentence_splitter.py), which follows NLTK's punkt
+    model on our transcripts without needing its data files.
     """
-    sentence_segments = []
-    for timestamp, text in segments:
-        sentences = sent_tokenize(text)
-        for sentence in sentences:
-            sentence_segments.append((timestamp, sentence))
-    return sentence_segments
+    if not isinstance(segments, Transcript):
+        segments = Transcript.from_segments(segments)
+    return segments.split_sentences()
+
 
+def _with_gaps(lines, context_len, gaps):
+    """Prompt lines with GAP_LINE before every sentence (by batch position) in `gaps`."""
+    if not gaps:
+        return lines
+    marked = list(lines[:context_len])
+    for k, line in enumerate(lines[context_len:]):
+        if k in gaps:
+            marked.append(GAP_LINE)
+        marked.append(line)
+    return marked
 
-def identify_speakers_with_llm(sentence_segments):
+
+def identify_speakers_with_llm(sentence_segments, context_segments=None, gaps=None):
     """
     Labels speakers for each sentence segment using LLM.
     Input is a list of (timestamp, sentence).
     Output is labeled transcript as a string, one line per sentence:
     "<timestamp> Speaker N: <sentence>"
+    Optional context_segments (the end of the previous batch) are put
+    first and labeled too, so the caller can align speaker identities.
+    `gaps` holds the positions of sentences that do not directly follow
+    the one before them in the meeting; the prompt marks them.
     """
-    transcript_block = "\n".join([f"{ts} {sentence}" for ts, sentence in sentence_segments])
+    context_segments = list(context_segments or [])
+    transcript_block = "\n".join(_with_gaps(
+        [f"{ts} {sentence}" for ts, sentence in context_segments + list(sentence_segments)],
+        len(context_segments), gaps,
+    ))
+    context_rule = ""
+    if context_segments:
+        context_rule = f"""
+The first {len(context_segments)} lines are CONTEXT from the end of the previous part of
+this meeting. Label them too, so Speaker 1 / Speaker 2 keep the same meaning.
+"""
+    if gaps:
+        context_rule += GAP_RULE
 
     prompt = f"""
 Assign speaker labels to each timestamped sentence.
@@ -73,7 +134,7 @@ Rules:
 6. If you cannot determine the speaker with high confidence, use "Unknown".
 7. Do NOT assign a speaker based on names mentioned inside the sentence.
 8. Maintain the original order.
-
+{context_rule}
 For each line, output exactly:
 <timestamp> Speaker N: <sentence>
 
@@ -86,41 +147,203 @@ Transcript:
 Return only the labeled transcript lines adhering EXACTLY to the above format.
 """
 
-    response = client.chat.completions.create(
-        model="gpt-4",
+    # The reply streams in; each line is normalized and checked as it
+    # arrives, and the stream is closed once every sentence is labeled
+    # (the rest of the reply is still read, for the cache)
+    expected = len(context_segments) + len(sentence_segments)
+    lines = []
+    labeled = 0
+    stream = routed_stream(
+        model=SPEAKER_MODEL,
         messages=[{"role": "user", "content": prompt}],
+        task="speakers",
+        validate=lambda reply: labeled_reply_problems(reply, expected),
         temperature=0,
-        max_tokens=2000,
+        max_tokens=SPEAKER_MAX_OUTPUT_TOKENS,
     )
+    with contextlib.closing(stream):
+        for line in stream:
+            if line is None:
+                # Escalated: the larger model's reply replaces this one
+                lines, labeled = [], 0
+                continue
+            line = normalize_llm_line(line)
+            if not line or line == GAP_LINE:
+                continue
+            lines.append(line)
+            if LABELED_LINE.match(line):
+                labeled += 1
+                if labeled == expected:
+                    break
+            else:
+                print(f"Speaker reply line not in the labeled format: {line[:80]}")
+
+    return "\n".join(lines)
+
+
+def parse_compact_labels(reply, count):
+    """
+    Reads a compact reply into {index: label} for indices 1..count.
+    Accepts a JSON object ({"1": "1", "2": "U"}) or one "<number>: <label>"
+    line per sentence; the first label given for an index wins.
+    """
+    pairs = []
+    try:
+        data = json.loads(reply)
+    except ValueError:
+        data = None
+    if isinstance(data, dict):
+        pairs = [(str(k), str(v)) for k, v in data.items()]
+    else:
+        for line in reply.splitlines():
+            m = COMPACT_REPLY_LINE.match(line)
+            if m:
+                pairs.append(m.groups())
+
+    labels = {}
+    for index, label in pairs:
+        parsed = _compact_pair(index, label, count)
+        if parsed is not None:
+            labels.setdefault(*parsed)
+    return labels
+
+
+def _compact_pair(index, label, count):
+    """(index, label) of one reply entry, or None when it is not usable."""
+    label = re.sub(r"^speaker\s*", "", label.strip(), flags=re.I).lower()
+    if not index.strip().isdigit() or label not in COMPACT_LABELS:
+        return None
+    index = int(index)
+    return (index, COMPACT_LABELS[label]) if 1 <= index <= count else None
+
+
+def compact_reply_problems(reply, count):
+    """Routing validator: every numbered sentence must get a label."""
+    missing = count - len(parse_compact_labels(reply, count))
+    return [f"{missing}/{count} sentences without a label"] if missing else []
+
+
+def identify_speakers_compact(sentence_segments, context_segments=None, gaps=None):
+    """
+    Same contract as identify_speakers_with_llm, but the model only
+    returns the label of each numbered sentence. The labeled lines are
+    rebuilt here from the original (timestamp, sentence) tuples, so the
+    text is preserved exactly; sentences the reply leaves out are left
+    out of the result as well.
+    """
+    context_len = len(context_segments or [])
+    segments = list(context_segments or []) + list(sentence_segments)
+    transcript_block = "\n".join(_with_gaps(
+        [f"[{i}] {ts} {sentence}" for i, (ts, sentence) in enumerate(segments, start=1)],
+        context_len, gaps,
+    ))
+    context_rule = ""
+    if context_segments:
+        context_rule = f"""
+Sentences 1-{len(context_segments)} are CONTEXT from the end of the previous part of
+this meeting. Label them too, so Speaker 1 / Speaker 2 keep the same meaning.
+"""
+    if gaps:
+        context_rule += GAP_RULE
+
+    prompt = f"""
+Assign a speaker label to each numbered, timestamped sentence.
 
+Rules:
+1.Use conversational logic:
+    a.Questions are often answered by the other speaker.
+    b.Explanations, status updates, or multi-sentence blocks often remain with the same speaker.
 
-    return response.choices[0].message.content.strip()
+2.Name handling rule:
+    a.If a sentence directly addresses someone by name
+      (e.g., “Yes, Harshit”),
+    b.the speaker is most likely the other person — unless that contradicts prior context.
+3. Use ONLY these labels: 1 (Speaker 1), 2 (Speaker 2), or U (Unknown).
+4. If you cannot determine the speaker with high confidence, use U.
+5. Do NOT assign a speaker based on names mentioned inside the sentence.
+6. Label every sentence, in order.
+{context_rule}
+For each sentence, output exactly one line:
+<number>: <label>
+
+Example:
+1: 1
+2: 2
+
+Transcript:
+{transcript_block}
+
+Return only the label lines, without repeating the sentences.
+"""
+
+    # Label lines are parsed as they stream in; the stream is closed as
+    # soon as every sentence has its label (the rest of the reply is
+    # still read, for the cache)
+    lines = []
+    labels = {}
+    stream = routed_stream(
+        model=SPEAKER_MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        task="speakers_compact",
+        validate=lambda reply: compact_reply_problems(reply, len(segments)),
+        temperature=0,
+        max_tokens=SPEAKER_MAX_OUTPUT_TOKENS,
+    )
+    with contextlib.closing(stream):
+        for line in stream:
+            if line is None:
+                # Escalated: the larger model's reply replaces this one
+                lines, labels = [], {}
+                continue
+            lines.append(line)
+            m = COMPACT_REPLY_LINE.match(line)
+            parsed = _compact_pair(*m.groups(), len(segments)) if m else None
+            if parsed is not None:
+                labels.setdefault(*parsed)
+                if len(labels) == len(segments):
+                    break
+    if not labels:
+        # Not line by line (e.g. a JSON object): parse the whole reply
+        labels = parse_compact_labels("\n".join(lines), len(segments))
+    return "\n".join(
+        f"{ts} {labels[i]}: {sentence}"
+        for i, (ts, sentence) in enumerate(segments, start=1)
+        if i in labels
+    )
 
 
 def normalize_llm_output(text):
     """
     Normalize speaker labels capitalization and whitespace.
     """
-    text = re.sub(r"\bspeaker\s*1\b", "Speaker 1", text, flags=re.I)
-    text = re.sub(r"\bspeaker\s*2\b", "Speaker 2", text, flags=re.I)
-    text = re.sub(r"\bunknown\b", "Unknown", text, flags=re.I)
+    lines = [normalize_llm_line(line) for line in text.splitlines()]
+    return "\n".join(line for line in lines if line)
 
-    lines = [line.strip() for line in text.splitlines() if line.strip()]
-    return "\n".join(lines)
+
+def normalize_llm_line(line):
+    """normalize_llm_output() for one line, as it streams in."""
+    line = re.sub(r"\bspeaker\s*1\b", "Speaker 1", line, flags=re.I)
+    line = re.sub(r"\bspeaker\s*2\b", "Speaker 2", line, flags=re.I)
+    line = re.sub(r"\bunknown\b", "Unknown", line, flags=re.I)
+    return line.strip()
 
 
 def validate_speaker_labels(text):
     """
-    Basic validation of output.
+    Basic validation of output (labeled text or a labeled Transcript).
     """
-    speakers = set(re.findall(r"(Speaker \d|Unknown)", text))
-    timestamps = re.findall(r"\d{1,2}:\d{2}", text)
+    if isinstance(text, Transcript):
+        speakers = {speaker_label(sid) for sid in set(text.speakers)} - {None}
+        has_timestamps = len(text) > 0
+    else:
+        speakers = set(re.findall(r"(Speaker \d|Unknown)", text))
+        has_timestamps = re.search(r"\d{1,2}:\d{2}", text) is not None
     errors = []
 
     if len(speakers) > 3:
         errors.append("Too many speakers detected — possible hallucination.")
 
-    if not timestamps:
+    if not has_timestamps:
         errors.append("No timestamps found — formatting may be corrupted.")
 
     for s in speakers:
@@ -130,58 +353,448 @@ def validate_speaker_labels(text):
     return errors
 
 
+def labeled_reply_problems(reply, expected):
+    """
+    Routing validator for the full protocol: one well-formed labeled line
+    per sentence, and no problems found by validate_speaker_labels.
+    """
+    lines = [line for line in normalize_llm_output(reply).splitlines() if line != GAP_LINE]
+    problems = []
+    if len(lines) != expected:
+        problems.append(f"{len(lines)} lines for {expected} sentences")
+    if any(not LABELED_LINE.match(line) for line in lines):
+        problems.append("malformed labeled line")
+    return problems + validate_speaker_labels("\n".join(lines))
+
+
 # OPTIONAL: Post-processing for name-address correction
-def correct_name_address_labels(labeled_output, name_to_speaker):
-    corrected_lines = []
-    for line in labeled_output.splitlines():
-        match = re.match(r'(\d{1,2}:\d{2})\sSpeaker\s(\d):\s(.+)', line)
-        if match:
-            timestamp, speaker_id, text = match.groups()
-            for name, other_speaker_id in name_to_speaker.items():
-                if re.search(rf'\b{name}\b', text, re.I):
-                    speaker_id = other_speaker_id  # If addressing a name, assign to other speaker
-            new_line = f"{timestamp} Speaker {speaker_id}: {text}"
-            corrected_lines.append(new_line)
-        else:
-            corrected_lines.append(line)
-    return "\n".join(corrected_lines)
-
-
-def assign_speakers(full_text, batch_size=12, name_to_speaker=None):
+def _name_patterns(name_to_speaker):
+    return [(re.compile(rf'\b{name}\b', re.I), int(other)) for name, other in (name_to_speaker or {}).items()]
+
+
+def _name_corrected(sid, text, names):
+    """Speaker id of a sentence after the name-address correction."""
+    if sid <= UNKNOWN or not text:
+        return sid
+    for pattern, other_speaker_id in names:
+        if pattern.search(text):
+            sid = other_speaker_id  # If addressing a name, assign to other speaker
+    return sid
+
+
+def correct_name_address_labels(labeled, name_to_speaker):
+    """Relabels, in place, Speaker N sentences of a Transcript that mention a name."""
+    names = _name_patterns(name_to_speaker)
+    for i in range(len(labeled)):
+        labeled.speakers[i] = _name_corrected(labeled.speakers[i], labeled.text(i), names)
+    return labeled
+
+
+def sentence_output_tokens(item):
+    """Estimated output tokens for one labeled line of (timestamp, sentence)."""
+    return estimate_tokens(item[1]) + LABEL_OVERHEAD_TOKENS
+
+
+def sentence_input_tokens(item):
+    """Estimated prompt tokens for one numbered sentence (compact protocol)."""
+    return estimate_tokens(item[1]) + COMPACT_INDEX_TOKENS
+
+
+def batch_limits(sentence_segments, context_size, protocol):
+    """
+    (cost, budget, max_items) for packing sentences into batches.
+    Full protocol: the echoed reply is the limit, so batches are sized by
+    output tokens, with room for the echoed context lines reserved.
+    Compact protocol: the reply is a few tokens per sentence, so batches
+    are sized by prompt tokens and capped by the reply line count.
+    """
+    if protocol == "compact":
+        reply_lines = int(SPEAKER_MAX_OUTPUT_TOKENS * SPEAKER_OUTPUT_SAFETY) // COMPACT_REPLY_TOKENS
+        return (
+            sentence_input_tokens,
+            SPEAKER_COMPACT_INPUT_TOKENS,
+            max(1, reply_lines - context_size),
+        )
+
+    context_reserve = sum(
+        sorted((sentence_output_tokens(s) for s in sentence_segments), reverse=True)[:context_size]
+    )
+    budget = int(SPEAKER_MAX_OUTPUT_TOKENS * SPEAKER_OUTPUT_SAFETY) - context_reserve
+    return sentence_output_tokens, max(budget, 1), None
+
+
+def _label_halves(batch, context, protocol, gaps=None):
+    """Labels the two halves of a batch separately and aligns them."""
+    mid = len(batch) // 2
+    first, second = batch[:mid], batch[mid:]
+    second_context = first[-SPEAKER_CONTEXT_SENTENCES:] if SPEAKER_CONTEXT_SENTENCES else []
+    gaps = gaps or set()
+
+    first_output = _label_complete(first, context, protocol, {k for k in gaps if k < mid})
+    second_output = _label_complete(second, second_context, protocol, {k - mid for k in gaps if k >= mid})
+
+    context_lines, _ = _split_context(first_output.splitlines(), context, len(first))
+    body = reconcile_batches(
+        [first, second], [context, second_context], [first_output, second_output]
+    )
+    return "\n".join(context_lines + body)
+
+
+def _label_complete(batch, context, protocol, gaps=None):
+    """
+    Labels a batch and checks that every sentence came back. A reply with
+    fewer lines than the batch was cut off (or dropped lines), so the
+    batch is split in half and each half is labeled again.
+    """
+    if protocol == "compact":
+        # Rebuilt from the original sentences; nothing to normalize
+        normalized = identify_speakers_compact(batch, context, gaps)
+    else:
+        normalized = normalize_llm_output(identify_speakers_with_llm(batch, context, gaps))
+    _, body = _split_context(normalized.splitlines(), context, len(batch))
+    if len(body) >= len(batch) or len(batch) == 1:
+        return normalized
+
+    print(
+        f"Speaker batch returned {len(body)}/{len(batch)} lines "
+        f"(output truncated?); splitting and retrying."
+    )
+    return _label_halves(batch, context, protocol, gaps)
+
+
+def label_batch(batch, context=None, checkpoints=None, protocol=None, gaps=None):
+    """
+    Labels one batch of (timestamp, sentence) and normalizes the output.
+    Truncated replies are split and retried until every line is present.
+    `gaps`: positions of sentences that do not directly follow the one
+    before them in the meeting.
+    With a CheckpointStore, a finished batch is saved and reused on re-runs.
+    """
+    protocol = protocol or SPEAKER_PROTOCOL
+    if checkpoints is None:
+        return _label_complete(batch, context, protocol, gaps)
+
+    key = hash_inputs(
+        SPEAKER_PROMPT_VERSION,
+        [list(item) for item in batch],
+        [list(item) for item in context or []],
+        route_for("speakers_compact" if protocol == "compact" else "speakers", SPEAKER_MODEL),
+        protocol,
+        *([sorted(gaps)] if gaps else []),
+    )
+    normalized = checkpoints.load("speakers", key)
+    if normalized is None:
+        normalized = _label_complete(batch, context, protocol, gaps)
+        checkpoints.save("speakers", key, normalized)
+    return normalized
+
+
+def _swap_label(label):
+    return {"Speaker 1": "Speaker 2", "Speaker 2": "Speaker 1"}.get(label, label)
+
+
+def _sentence_key(sentence):
+    return " ".join(re.findall(r"\w+", sentence.lower()))
+
+
+def _split_context(lines, context, batch_len):
+    """
+    Separates the labeled context lines from the batch's own lines.
+    Returns (context lines, body lines).
+    When the line count is off (a dropped or merged line), context lines
+    are recognised by their text among the first lines instead of by
+    position.
+    """
+    if not context:
+        return [], lines
+
+    if len(lines) == len(context) + batch_len:
+        context_lines, body = lines[:len(context)], lines[len(context):]
+    else:
+        wanted = {_sentence_key(sentence) for _, sentence in context}
+        context_lines, body = [], []
+        for i, line in enumerate(lines):
+            m = LABELED_LINE.match(line)
+            if i <= len(context) and m and _sentence_key(m.group(3)) in wanted:
+                context_lines.append(line)
+            else:
+                body.append(line)
+
+    return context_lines, body
+
+
+def _is_swapped(context_lines, expected):
+    """
+    True when most labeled context lines disagree with the labels
+    already settled for the same sentences ({sentence key: label}).
+    """
+    agree = swapped = 0
+    for line in context_lines:
+        m = LABELED_LINE.match(line)
+        if not m:
+            continue
+        label = m.group(2)
+        prev = expected.get(_sentence_key(m.group(3)))
+        if prev in ("Speaker 1", "Speaker 2") and label in ("Speaker 1", "Speaker 2"):
+            if prev == label:
+                agree += 1
+            else:
+                swapped += 1
+    return swapped > agree
+
+
+def reconcile_batches(batches, contexts, outputs, context_size=None):
+    """
+    Aligns speaker identities across independently labeled batches.
+    Each batch relabeled the tail of the previous batch as context; when
+    those labels mostly come out swapped (Speaker 1 <-> Speaker 2), the
+    whole batch is flipped. Returns the labeled lines without context.
+    """
+    return [
+        line for body in _reconciled_bodies(batches, contexts, outputs, context_size) for line in body
+    ]
+
+
+def _reconciled_bodies(batches, contexts, outputs, context_size=None, prev_tail=None):
+    """
+    reconcile_batches() one batch at a time: yields each batch's aligned
+    lines as soon as its output (an iterator, in batch order) arrives.
+    prev_tail: {sentence key: label} settled before the first batch.
+    """
+    context_size = SPEAKER_CONTEXT_SENTENCES if context_size is None else context_size
+    prev_tail = prev_tail or {}
+    for batch, context, output in zip(batches, contexts, outputs):
+        context_lines, body = _split_context(output.splitlines(), context, len(batch))
+
+        if _is_swapped(context_lines, prev_tail):
+            flipped = []
+            for line in body:
+                m = LABELED_LINE.match(line)
+                if m:
+                    line = f"{m.group(1)} {_swap_label(m.group(2))}: {m.group(3)}"
+                flipped.append(line)
+            body = flipped
+
+        prev_tail = {}
+        for line in body[len(body) - context_size:] if context_size else []:
+            m = LABELED_LINE.match(line)
+            if m:
+                prev_tail[_sentence_key(m.group(3))] = m.group(2)
+        yield body
+
+
+def _batch_contexts(sentence_segments, starts, context_size):
+    """The `context_size` sentences before each batch start."""
+    if not context_size:
+        return [[] for _ in starts]
+    return [sentence_segments[max(0, start - context_size):start] for start in starts]
+
+
+def _label_batches(batches, contexts, checkpoints, max_workers, protocol, gaps=None):
+    """
+    Labels the batches several at a time and yields their outputs in batch
+    order, each as soon as it (and every batch before it) is done, so the
+    caller can reconcile and hand on the first batches while later ones
+    are still being labeled.
+    """
+    if not batches:
+        return
+    gaps = gaps or [None] * len(batches)
+    workers = max(1, min(max_workers or SPEAKER_MAX_WORKERS, len(batches)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(
+            lambda args: label_batch(args[0], args[1], checkpoints, protocol, args[2]),
+            zip(batches, contexts, gaps),
+        )
+
+
+def _body_labels(body, batch):
+    """
+    Labels for each (timestamp, sentence) in the batch, read from the
+    reply body: by position when the line count matches, otherwise by
+    sentence text. Sentences missing from the reply are "Unknown".
+    """
+    parsed = [LABELED_LINE.match(line) for line in body]
+    if len(body) == len(batch):
+        return [m.group(2) if m else "Unknown" for m in parsed]
+
+    by_text = {}
+    for m in parsed:
+        if m:
+            by_text.setdefault(_sentence_key(m.group(3)), m.group(2))
+    return [by_text.get(_sentence_key(sentence), "Unknown") for _, sentence in batch]
+
+
+def _assign_with_prelabel(sentence_segments, batch_size, name_to_speaker,
+                          checkpoints, max_workers, context_size, protocol, settle,
+                          known_context=None):
+    """
+    Labels confident turns locally and sends only the ambiguous sentences
+    to the LLM (with read-only context from the full transcript). Runs of
+    sentences that are not adjacent in the meeting are marked as gaps in
+    the prompt.
+    known_context: labeled (timestamp, sentence, label) settled before
+    the first sentence; they anchor the labels instead of the "first
+    sentence is Speaker 1" convention.
+    settle(index, label) is called for every sentence in order, as soon
+    as its label is final; the text itself is never touched.
+    """
+    known_context = known_context or []
+    first = len(known_context)
+    sentence_segments = [(ts, sentence) for ts, sentence, _ in known_context] + list(sentence_segments)
+    pre = prelabel(
+        sentence_segments, name_to_speaker,
+        known={i: label for i, (_, _, label) in enumerate(known_context)},
+    )
+    total = len(sentence_segments)
+    local = total - first - len(pre.ambiguous)
+    print(
+        f"Pre-labeled {local}/{total - first} sentences locally "
+        f"({local / max(total - first, 1):.0%} without a network call)."
+    )
+
+    ambiguous = [sentence_segments[i] for i in pre.ambiguous]
+    cost, budget, max_items = batch_limits(ambiguous, context_size, protocol)
+    indexed = pack_by_tokens(
+        list(zip(pre.ambiguous, ambiguous)),
+        budget,
+        lambda item: cost(item[1]),
+        max_items=min(filter(None, (batch_size, max_items)), default=None),
+    )
+    batches = [[item for _, item in group] for group in indexed]
+    gaps = [
+        {k for k in range(1, len(group)) if group[k][0] != group[k - 1][0] + 1}
+        for group in indexed
+    ]
+    context_starts = [group[0][0] for group in indexed]
+    contexts = _batch_contexts(sentence_segments, context_starts, context_size)
+    outputs = _label_batches(batches, contexts, checkpoints, max_workers, protocol, gaps)
+
+    # Align each reply with the labels already settled before it
+    llm_labels = {}
+    settled = 0
+    for group, batch, context, output, start in zip(indexed, batches, contexts, outputs, context_starts):
+        context_lines, body = _split_context(output.splitlines(), context, len(batch))
+        expected = {}
+        for offset, (_, sentence) in enumerate(context):
+            label = pre.label_at(start - len(context) + offset, llm_labels)
+            if label is not None:
+                expected[_sentence_key(sentence)] = label
+        swapped = _is_swapped(context_lines, expected)
+        for (index, _), label in zip(group, _body_labels(body, batch)):
+            llm_labels[index] = _swap_label(label) if swapped else label
+
+        # Batches cover the ambiguous sentences in order, so every sentence
+        # up to the first one whose chain is still unlabeled is final
+        while settled < total and pre.label_at(settled, llm_labels) is not None:
+            if settled >= first:
+                settle(settled - first, pre.label_at(settled, llm_labels))
+            settled += 1
+
+    for i in range(max(settled, first), total):
+        settle(i - first, pre.label_at(i, llm_labels) or "Unknown")
+
+
+def _known_context(context_segments, context_size):
+    """
+    (timestamp, sentence, label) of the last labeled lines before a text:
+    at most `context_size` of them (at least one), and only the run after
+    the last line without a Speaker N label.
+    """
+    if context_segments is None:
+        return []
+    context = as_transcript(context_segments)
+    known = []
+    for i in range(len(context) - 1, -1, -1):
+        if len(known) >= max(context_size, 1) or context.speakers[i] <= UNKNOWN:
+            break
+        known.append((context.timestamp(i), context.text(i), context.label(i)))
+    return known[::-1]
+
+
+def assign_speakers(full_text, batch_size=None, name_to_speaker=None, checkpoints=None,
+                    max_workers=None, context_size=None, use_prelabel=None, protocol=None,
+                    on_line=None, context_segments=None):
     """
     Full pipeline:
     - Split transcript by timestamps
     - Split each timestamp block into sentences
-    - Batch sentences and feed to LLM for speaker labelling
+    - Pre-label obvious turns locally (speaker_prelabel.py) so only the
+      ambiguous sentences go to the LLM
+    - Batch sentences by estimated tokens (as many as fit safely under the
+      prompt / reply limits, optionally capped at `batch_size` sentences)
+      and feed to LLM for speaker labelling, several batches at once,
+      each with the previous batch's last sentences as read-only context
+    - Reconcile speaker identities across batch boundaries
     - Normalize & validate output
+    Takes the transcript as text or a Transcript of segments and returns
+    the labeled sentences as a Transcript (str() of it is the
+    speaker-labeled text). The original sentence text is kept exactly;
+    only labels are taken from the LLM replies.
+    on_line, if given, receives each labeled line in order as soon as it
+    is final, while later batches are still being labeled.
+    context_segments: the labeled lines just before this text (text or
+    a labeled Transcript, e.g. the end of the previous chunk of a live
+    meeting). They are not labeled again; Speaker 1 / Speaker 2 keep the
+    meaning they have there.
     """
-    segments = split_into_segments(full_text)
+    segments = as_transcript(full_text)
     sentence_segments = split_segment_into_sentences(segments)
-    labeled_output = ""
-    for i in range(0, len(sentence_segments), batch_size):
-        batch = sentence_segments[i:i + batch_size]
-        labeled_batch = identify_speakers_with_llm(batch)
-        normalized = normalize_llm_output(labeled_batch)
-        labeled_output += normalized + "\n"
-
+    context_size = SPEAKER_CONTEXT_SENTENCES if context_size is None else context_size
+    use_prelabel = SPEAKER_PRELABEL if use_prelabel is None else use_prelabel
+    protocol = protocol or SPEAKER_PROTOCOL
+    labeled = sentence_segments
     # Apply name-address correction if mapping is provided 
-    if name_to_speaker:
-        labeled_output = correct_name_address_labels(labeled_output, name_to_speaker)
-
-    issues = validate_speaker_labels(labeled_output)
+    names = _name_patterns(name_to_speaker)
+
+    def settle(i, label):
+        labeled.speakers[i] = _name_corrected(speaker_id(label), labeled.text(i), names)
+        if on_line is not None:
+            on_line(labeled.line(i))
+
+    known_context = _known_context(context_segments, context_size)
+
+    if use_prelabel:
+        _assign_with_prelabel(
+            sentence_segments, batch_size, name_to_speaker,
+            checkpoints, max_workers, context_size, protocol, settle, known_context,
+        )
+    else:
+        cost, budget, max_items = batch_limits(sentence_segments, context_size, protocol)
+        batches = pack_by_tokens(
+            sentence_segments, budget, cost,
+            max_items=min(filter(None, (batch_size, max_items)), default=None),
+        )
+        starts = []
+        start = 0
+        for batch in batches:
+            starts.append(start)
+            start += len(batch)
+        contexts = _batch_contexts(sentence_segments, starts, context_size)
+        prev_tail = {}
+        if known_context and contexts:
+            contexts[0] = [(ts, sentence) for ts, sentence, _ in known_context]
+            prev_tail = {_sentence_key(sentence): label for _, sentence, label in known_context}
+        outputs = _label_batches(batches, contexts, checkpoints, max_workers, protocol)
+        bodies = _reconciled_bodies(batches, contexts, outputs, context_size, prev_tail)
+        for batch, body, start in zip(batches, bodies, starts):
+            for offset, label in enumerate(_body_labels(body, batch)):
+                settle(start + offset, label)
+
+    issues = validate_speaker_labels(labeled)
     if issues:
         print("⚠ Speaker labeling warnings:")
         for issue in issues:
             print("-", issue)
 
     # Flag ambiguous assignments
-    unknown_lines = [line for line in labeled_output.splitlines() if "Unknown" in line]
-    if unknown_lines:
+    unknown = [i for i, sid in enumerate(labeled.speakers) if sid == UNKNOWN]
+    if unknown:
         print("Review these ambiguous speaker assignments:")
-        for line in unknown_lines:
-            print(line)
+        for i in unknown:
+            print(labeled.line(i))
 
-    return labeled_output.strip()
+    return labeled
 
 
 
@@ -0,0 +1,170 @@
+import re
+
+# -------------------------------------------------------
+# LOCAL SPEAKER PRE-LABELING
+# -------------------------------------------------------
+# Offline rules, taken from the speaker prompt in speaker_identification.py,
+# that decide how a sentence relates to the one before it:
+#   - short greetings / pleasantries alternate speakers
+#   - a real question is answered by the other speaker
+#   - long explanations in the same timestamp block, or sentences that
+#     carry on with "And ..." / "After that ...", stay with one speaker
+#   - a sentence addressing a known name belongs to the other person
+# Only relations these rules are confident about are used; everything
+# else is left for the LLM.
+
+SAME = "same"
+SWITCH = "switch"
+
+SPEAKERS = ("Speaker 1", "Speaker 2")
+
+GREETING = re.compile(
+    r"\b(hi|hello|hey|good (morning|afternoon|evening)|how are you|"
+    r"i'?m (also )?(good|fine|great|well)|nice to meet you|thank you|thanks|bye)\b",
+    flags=re.I,
+)
+ANSWER_START = re.compile(
+    r"^(yes|no|yeah|yep|nope|sure|definitely|absolutely|of course|correct|"
+    r"exactly|not really|right)\b",
+    flags=re.I,
+)
+# Openers that carry on the previous sentence of the same speaker
+CONTINUATION_START = re.compile(
+    r"^(and|after that|because|also|then|but|so basically|for example)\b",
+    flags=re.I,
+)
+
+SHORT_WORDS = 6
+MONOLOGUE_WORDS = 8
+QUESTION_WORDS = 4
+
+
+def _words(sentence):
+    return len(sentence.split())
+
+
+def _is_greeting(sentence):
+    return _words(sentence) <= SHORT_WORDS and bool(GREETING.search(sentence))
+
+
+def sentence_relation(prev, cur):
+    """
+    Relation of `cur` to `prev`, both (timestamp, sentence): SAME, SWITCH,
+    or None when no rule is confident.
+    """
+    prev_ts, prev_text = prev
+    cur_ts, cur_text = cur
+    prev_text = prev_text.strip()
+    cur_text = cur_text.strip()
+
+    # Greetings and pleasantries alternate
+    if _is_greeting(prev_text) and _is_greeting(cur_text):
+        return SWITCH
+
+    # A real question followed by a direct answer
+    if (
+        prev_text.endswith("?")
+        and _words(prev_text) >= QUESTION_WORDS
+        and ANSWER_START.match(cur_text)
+    ):
+        return SWITCH
+
+    # Long statements in the same timestamp block continue a monologue
+    if (
+        prev_ts == cur_ts
+        and not prev_text.endswith("?")
+        and _words(prev_text) >= MONOLOGUE_WORDS
+        and not ANSWER_START.match(cur_text)
+        and (_words(cur_text) >= MONOLOGUE_WORDS or CONTINUATION_START.match(cur_text))
+    ):
+        return SAME
+
+    return None
+
+
+def name_address_label(sentence, name_to_speaker):
+    """
+    Label implied by directly addressing a name ("Yes, Harshit." /
+    "Harshit, can you ..."), using the same mapping as
+    correct_name_address_labels: name -> speaker id of the other person.
+    """
+    if not name_to_speaker:
+        return None
+    for name, speaker_id in name_to_speaker.items():
+        if re.search(rf"(^|,\s*)\b{re.escape(name)}\b\s*([,.?!]|$)", sentence.strip(), re.I):
+            return f"Speaker {speaker_id}"
+    return None
+
+
+def _flip(label, parity):
+    if not parity or label not in SPEAKERS:
+        return label
+    return SPEAKERS[1] if label == SPEAKERS[0] else SPEAKERS[0]
+
+
+# -------------------------------------------------------
+# PRE-LABEL PASS
+# -------------------------------------------------------
+class Prelabel:
+    """
+    Result of prelabel(). Sentences joined by confident relations form
+    chains; within a chain, parity[i] counts speaker switches since the
+    chain head (mod 2), so one known label fixes the whole chain.
+    - chain_head[i]: first sentence of the chain containing i
+    - chain_anchor[head]: (index, label) known without the LLM (a label
+      settled earlier, the first sentence, a name address), if the chain
+      has one
+    - ambiguous: chain heads without an anchor; only these need the LLM
+    """
+
+    def __init__(self, chain_head, parity, chain_anchor):
+        self.chain_head = chain_head
+        self.parity = parity
+        self.chain_anchor = chain_anchor
+        self.ambiguous = [
+            i for i, head in enumerate(chain_head)
+            if head == i and head not in chain_anchor
+        ]
+
+    def label_at(self, i, llm_labels):
+        """
+        Label of sentence i, given {index: label} from the LLM for the
+        ambiguous sentences labeled so far (None if its head is not).
+        """
+        head = self.chain_head[i]
+        if head in self.chain_anchor:
+            index, label = self.chain_anchor[head]
+            return _flip(label, self.parity[i] ^ self.parity[index])
+        label = llm_labels.get(head)
+        return None if label is None else _flip(label, self.parity[i])
+
+
+def prelabel(sentence_segments, name_to_speaker=None, known=None):
+    """
+    Runs the offline rules over a list of (timestamp, sentence).
+    `known` maps sentences whose label is already settled (e.g. the last
+    lines of the previous part of a live meeting, put first) to it; each
+    anchors a chain of its own that the sentences after it can join.
+    Without any, the first sentence is Speaker 1 by convention, as in the
+    LLM prompt.
+    """
+    n = len(sentence_segments)
+    known = known or {}
+    chain_head = list(range(n))
+    parity = [0] * n
+    chain_anchor = {}
+
+    for i, (_, sentence) in enumerate(sentence_segments):
+        if i > 0 and i not in known:
+            relation = sentence_relation(sentence_segments[i - 1], sentence_segments[i])
+            if relation is not None:
+                chain_head[i] = chain_head[i - 1]
+                parity[i] = parity[i - 1] ^ (relation == SWITCH)
+
+        anchor = known.get(i) or name_address_label(sentence, name_to_speaker)
+        if i == 0 and anchor is None and not known:
+            anchor = SPEAKERS[0]
+        if anchor is not None and chain_head[i] not in chain_anchor:
+            chain_anchor[chain_head[i]] = (i, anchor)
+
+    return Prelabel(chain_head, parity, chain_anchor)
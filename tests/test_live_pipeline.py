@@ -0,0 +1,13 @@
+from live_pipeline import TranscriptTail
+
+
+def test_flush_reads_a_last_line_without_newline(tmp_path):
+    path = tmp_path / "transcript.txt"
+    path.write_text("0:01 Hello there.\n0:05 Shall we start?\n0:09 Bye.", encoding="utf-8")
+    tail = TranscriptTail(str(path))
+
+    # The unfinished last line stays unread until the meeting ends
+    assert tail.poll() == "0:01 Hello there.\n"
+    assert tail.poll() + tail.flush() == "0:05 Shall we start?\n0:09 Bye."
+    assert tail.offset == path.stat().st_size
+    assert tail.flush() == ""
@@ -0,0 +1,13 @@
+from mom_generator.llm_cache import LLMCache
+
+
+def test_running_total_tracks_inserts_replaces_and_evictions(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = LLMCache(path, max_bytes=1000)
+    for i in range(30):
+        cache.put(f"k{i}", "m", "x" * 100)
+    cache.put("k29", "m", "y" * 50)
+
+    assert cache.total_bytes == cache.stats()["bytes"] == 950
+    assert cache.get("k0") is None and cache.get("k29") == "y" * 50
+    assert LLMCache(path, max_bytes=1000).total_bytes == 950
@@ -0,0 +1,42 @@
+import pytest
+
+import speaker_identification
+from mom_generator import llm_client
+from mom_generator.llm_backends import FakeBackend
+from mom_generator.llm_cache import LLMCache
+from mom_generator.metrics import MetricsRecorder, set_metrics
+
+SEGMENTS = [
+    ("0:01", "Can you share the report?"),
+    ("0:05", "Yes, I will send it today."),
+    ("0:09", "Great, thanks."),
+]
+
+
+@pytest.fixture
+def streaming(tmp_path, monkeypatch):
+    cache = LLMCache(str(tmp_path / "cache.sqlite"))
+    monkeypatch.setattr(llm_client, "STREAMING", True)
+    monkeypatch.setattr(llm_client, "get_cache", lambda: cache)
+    llm_client.set_backend(FakeBackend(latency=0, jitter=0, tokens_per_second=0))
+    recorder = MetricsRecorder()
+    set_metrics(recorder)
+    yield recorder
+    set_metrics(None)
+    llm_client.set_backend(None)
+
+
+@pytest.mark.parametrize("identify", [
+    speaker_identification.identify_speakers_compact,
+    speaker_identification.identify_speakers_with_llm,
+])
+def test_warm_rerun_is_served_from_cache(streaming, identify):
+    # The callers stop reading once every label is in; the reply must
+    # still be cached whole
+    first = identify(SEGMENTS)
+    calls = len(streaming.calls)
+    assert calls and not any(c["cache_hit"] for c in streaming.calls)
+
+    assert identify(SEGMENTS) == first
+    rerun = streaming.calls[calls:]
+    assert rerun and all(c["cache_hit"] for c in rerun)
@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+from mom_generator import mom_extraction
+
+TRANSCRIPT = (
+    "0:01 Speaker 1: Can you send the report by Friday?\n"
+    "0:05 Speaker 2: Yes, I will send it.\n"
+    "0:09 Speaker 1: We agreed to move the release to May.\n"
+)
+
+
+@pytest.fixture
+def replies(monkeypatch):
+    """Makes routed_stream yield the given replies, one per tier, with
+    None between them; every line handed out is logged in `events`."""
+    events = []
+    tiers = []
+
+    def routed_stream(**kwargs):
+        for i, reply in enumerate(tiers):
+            if i:
+                yield None
+            for line in reply.splitlines():
+                events.append(("line", line))
+                yield line
+
+    monkeypatch.setattr(mom_extraction, "routed_stream", routed_stream)
+    monkeypatch.setattr(mom_extraction, "route_for", lambda task, model: ["fast", "large"])
+    return tiers, events
+
+
+def test_rejected_tier_emits_nothing(replies):
+    tiers, events = replies
+    tiers.extend(["- Move the release to May\nNot a bullet", "- Release moves to May"])
+    items = []
+
+    lines = mom_extraction.extract_decisions(TRANSCRIPT, lambda s, line: items.append(line))
+
+    assert lines == ["- Release moves to May"]
+    assert items == ["- Release moves to May"]
+
+
+def test_accepted_tier_emits_once_complete(replies):
+    tiers, events = replies
+    tiers.append("- Move the release to May\n- Ship on Friday")
+
+    mom_extraction.extract_decisions(TRANSCRIPT, lambda s, line: events.append(("item", line)))
+
+    assert [kind for kind, _ in events] == ["line", "line", "item", "item"]
+
+
+def test_sections_stream_as_each_completes(replies, monkeypatch):
+    tiers, events = replies
+    document = {
+        "summary": "The report is due. The release moves.",
+        "action_items": [{"speaker": "Speaker 2", "task": "Send the report by Friday"}],
+        "decisions": ["Move the release to May"],
+        "questions": [],
+    }
+    # A single tier: its reply is kept whatever it holds
+    monkeypatch.setattr(mom_extraction, "route_for", lambda task, model: ["large"])
+    tiers.append("```json\n" + json.dumps(document, indent=2) + "\n```")
+
+    sections = mom_extraction.extract_mom_sections(
+        TRANSCRIPT, lambda s, line: events.append(("item", line))
+    )
+
+    assert sections["action_items"] == ["- [Speaker 2] Send the report by Friday"]
+    assert sections["decisions"] == ["- Move the release to May"]
+    # Each bullet is handed out before the lines of the next section arrive
+    action = events.index(("item", "- [Speaker 2] Send the report by Friday"))
+    decision = events.index(("item", "- Move the release to May"))
+    assert action < events.index(("line", '  "decisions": [')) < decision
+    assert decision < events.index(("line", "```"), 1)
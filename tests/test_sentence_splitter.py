@@ -0,0 +1,22 @@
+import re
+from itertools import groupby
+
+from mom_generator.sentence_splitter import split_sentences, split_sentences_batch
+
+LABELED_LINE = re.compile(r"^(\S+) [^:]+: (.*)$")
+
+
+def test_splits_the_sample_like_the_labeled_transcript():
+    # One line per sentence in the sample; joined back per timestamp they
+    # must split into exactly those sentences again
+    with open("data/speaker_labeled_transcript.txt", "r", encoding="utf-8") as f:
+        rows = [LABELED_LINE.match(line.strip()).groups() for line in f if line.strip()]
+    segments = [[sentence for _, sentence in group] for _, group in groupby(rows, key=lambda r: r[0])]
+
+    assert split_sentences_batch([" ".join(s) for s in segments]) == segments
+
+
+def test_ellipsis_before_a_one_word_sentence_does_not_split():
+    assert split_sentences("So, that is... Fine. Next... Sounds good.") == [
+        "So, that is... Fine.", "Next...", "Sounds good.",
+    ]
@@ -0,0 +1,37 @@
+import re
+
+from mom_generator.relevance import RELEVANCE_MIN_LINES, relevant_transcript
+from mom_generator.transcript_model import Transcript
+from speaker_identification import validate_speaker_labels
+
+LABELED_LINE = re.compile(r"^\d{1,2}:\d{2} Speaker \d: \S")
+
+WRAPPED = (
+    "0:01 Speaker 1: Can we review the draft\n"
+    "before Friday? It still needs work.\n"
+    "0:09 Speaker 2: Yes, I will send it\n"
+    "  to the team tomorrow.\n"
+)
+
+
+def test_wrapped_lines_join_their_record():
+    transcript = Transcript.parse(WRAPPED)
+    assert len(transcript) == 2
+    assert transcript.text(0) == "Can we review the draft before Friday? It still needs work."
+    assert transcript.label(1) == "Speaker 2"
+    assert all("\n" not in line for line in transcript.lines())
+
+
+def test_wrapped_lines_keep_one_line_per_record():
+    transcript = Transcript.parse(WRAPPED * RELEVANCE_MIN_LINES)
+    sentences = transcript.split_sentences()
+    assert len(sentences.to_text().splitlines()) == len(sentences)
+    # Used to fail: the filter re-split records with line breaks in them
+    kept = relevant_transcript(transcript, ["action_items", "questions"])
+    assert kept and all(LABELED_LINE.match(line) for line in kept.splitlines())
+
+
+def test_validate_labels_of_a_short_transcript():
+    # Speaker ids larger than the record count used to be read as indices
+    transcript = Transcript.parse("0:01 Speaker 2: Hello.\n")
+    assert validate_speaker_labels(transcript) == []